@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -22,12 +23,30 @@ class Settings(BaseSettings):
     # Qdrant Vector Database
     QDRANT_HOST: str = Field("localhost", env="QDRANT_HOST")
     QDRANT_PORT: int = Field(6333, env="QDRANT_PORT")
+    QDRANT_GRPC_PORT: int = Field(6334, env="QDRANT_GRPC_PORT")
+    QDRANT_PREFER_GRPC: bool = Field(False, env="QDRANT_PREFER_GRPC")
     QDRANT_COLLECTION_NAME: str = Field("sequential_questioning", env="QDRANT_COLLECTION_NAME")
     
     # Language Model
     OPENAI_API_KEY: str = Field(..., env="OPENAI_API_KEY")
     OPENAI_MODEL_NAME: str = Field("gpt-3.5-turbo", env="OPENAI_MODEL_NAME")
     LLM_TEMPERATURE: float = Field(0.7, env="LLM_TEMPERATURE")
+    VECTOR_UPSERT_MAX_BATCH: int = Field(128, env="VECTOR_UPSERT_MAX_BATCH")
+    VECTOR_UPSERT_MAX_WAIT_MS: float = Field(50.0, env="VECTOR_UPSERT_MAX_WAIT_MS")
+    LLM_MAX_CONCURRENCY: int = Field(20, env="LLM_MAX_CONCURRENCY")
+    LLM_MAX_CONNECTIONS: int = Field(100, env="LLM_MAX_CONNECTIONS")
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = Field(50, env="LLM_MAX_KEEPALIVE_CONNECTIONS")
+    QDRANT_MAX_CONNECTIONS: int = Field(100, env="QDRANT_MAX_CONNECTIONS")
+    QDRANT_MAX_KEEPALIVE_CONNECTIONS: int = Field(40, env="QDRANT_MAX_KEEPALIVE_CONNECTIONS")
+    HTTP_KEEPALIVE_EXPIRY: float = Field(30.0, env="HTTP_KEEPALIVE_EXPIRY")
+    LLM_WARMUP_ON_STARTUP: bool = Field(True, env="LLM_WARMUP_ON_STARTUP")
+    
+    # Response caching
+    QUESTION_CACHE_TTL_SECONDS: float = Field(3600, env="QUESTION_CACHE_TTL_SECONDS")
+    QUESTION_CACHE_MAX_SIZE: int = Field(1024, env="QUESTION_CACHE_MAX_SIZE")
+    EMBEDDING_CACHE_MAX_SIZE: int = Field(1024, env="EMBEDDING_CACHE_MAX_SIZE")
+    QUERY_CACHE_MAX_SIZE: int = Field(1024, env="QUERY_CACHE_MAX_SIZE")
+    QUERY_CACHE_SIMILARITY_THRESHOLD: float = Field(0.97, env="QUERY_CACHE_SIMILARITY_THRESHOLD")
     
     # Security
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
@@ -38,6 +57,11 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings from environment variables."""
+    """Get application settings from environment variables.
+    
+    Settings are parsed once per process; call ``get_settings.cache_clear()``
+    to pick up changed environment variables.
+    """
     return Settings() 
\ No newline at end of file
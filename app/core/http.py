@@ -0,0 +1,27 @@
+from functools import lru_cache
+
+import httpx
+
+from app.core.config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_openai_http_client() -> httpx.AsyncClient:
+    """Get the HTTP client shared by all OpenAI API calls.
+    
+    Chat completions and embeddings go through one connection pool, so they
+    reuse each other's kept-alive connections, and HTTP/2 multiplexes
+    concurrent calls over a single connection.
+    
+    Returns:
+        The shared async HTTP client
+    """
+    settings = get_settings()
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+    )
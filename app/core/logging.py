@@ -1,12 +1,51 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Set
 
 from app.core.config import get_settings
 
-settings = get_settings()
+# Shared formatter; UTC timestamps, marked with a trailing Z, avoid a local
+# timezone conversion per record
+_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    "%Y-%m-%d %H:%M:%SZ"
+)
+_FORMATTER.converter = time.gmtime
+
+# Records are enqueued on the calling thread and written out by a background
+# listener, so file/stdout I/O never blocks the event loop.
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+DEFAULT_LOGS_DIR = "logs"
+
+# Directories already created by this process
+_ready_log_dirs: Set[str] = set()
+
+
+def _ensure_log_dir(log_dir: str) -> None:
+    """Create a log directory, at most once per process."""
+    if log_dir and log_dir not in _ready_log_dirs:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        _ready_log_dirs.add(log_dir)
+
+
+def _stop_queue_listener() -> None:
+    """Flush and stop the background logging listener."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
 
 
 def setup_logging(
@@ -25,6 +64,7 @@ def setup_logging(
         Configured logger instance
     """
     # Get settings values if not provided
+    settings = get_settings()
     if log_level is None:
         log_level = "DEBUG" if settings.DEBUG else "INFO"
     
@@ -36,49 +76,59 @@ def setup_logging(
     if not isinstance(numeric_level, int):
         numeric_level = logging.INFO
     
-    # Create logs directory if it doesn't exist
-    if log_file:
-        log_dir = os.path.dirname(log_file)
-        if log_dir:
-            Path(log_dir).mkdir(parents=True, exist_ok=True)
-    
-    # Configure logging
-    logging_config = {
-        "level": numeric_level,
-        "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        "datefmt": "%Y-%m-%d %H:%M:%S",
-    }
-    
-    # Always create a logs directory
-    logs_dir = "logs"
-    Path(logs_dir).mkdir(parents=True, exist_ok=True)
-    
     # Default log file location if not specified
     if log_file is None:
-        log_file = os.path.join(logs_dir, "app.log")
-        
-    logging_config["filename"] = log_file
-    logging_config["filemode"] = "a"  # Append mode
+        log_file = os.path.join(DEFAULT_LOGS_DIR, "app.log")
     
-    # Apply configuration
-    logging.basicConfig(**logging_config)
+    # Create the log directory if it doesn't exist
+    _ensure_log_dir(os.path.dirname(log_file))
     
-    # Create and return logger
-    logger = logging.getLogger(app_name)
-    logger.setLevel(numeric_level)
+    # File handler receives every record that reaches the root logger
+    file_handler = logging.FileHandler(log_file, mode="a")  # Append mode
+    file_handler.setLevel(numeric_level)
+    file_handler.setFormatter(_FORMATTER)
     
-    # Add stream handler to output to console
+    # Console output is limited to the application logger
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
-    formatter = logging.Formatter(logging_config["format"], logging_config["datefmt"])
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_FORMATTER)
+    console_handler.addFilter(logging.Filter(app_name))
+    
+    # Hand the real handlers to a background listener thread
+    global _queue_listener
+    _stop_queue_listener()
+    _queue_listener = logging.handlers.QueueListener(
+        _log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
+    
+    # Only the non-blocking queue handler is attached on the request path
+    root_logger = logging.getLogger()
+    root_logger.setLevel(numeric_level)
+    if _queue_handler not in root_logger.handlers:
+        root_logger.addHandler(_queue_handler)
     
-    # Only add the handler if it's not already there
-    if not any(isinstance(handler, logging.StreamHandler) for handler in logger.handlers):
-        logger.addHandler(console_handler)
+    # Create and return logger; records propagate to the root queue handler
+    logger = logging.getLogger(app_name)
+    logger.setLevel(numeric_level)
     
     return logger
 
 
-# Create default application logger
-app_logger = setup_logging(log_file="logs/app.log") 
\ No newline at end of file
+def get_app_logger() -> logging.Logger:
+    """Return the application logger, configuring logging on first use.
+    
+    Returns:
+        The application logger
+    """
+    if _queue_listener is None:
+        setup_logging()
+    return app_logger
+
+
+atexit.register(_stop_queue_listener)
+
+# Application logger; handlers are attached by setup_logging/get_app_logger
+# rather than at import time
+app_logger = logging.getLogger(get_settings().APP_NAME)
+ 
\ No newline at end of file
@@ -1,33 +1,59 @@
 import time
 import functools
-from typing import Callable, Any, Dict, Optional
-import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Any, Dict, List, Optional
 from datetime import datetime
 
+import orjson
+from pydantic import BaseModel
+
 from app.core.logging import app_logger
 
 
-class Metrics:
-    """Simple metrics collection for the application."""
+class _EndpointStats:
+    """Running request aggregates for a single endpoint."""
     
-    _instance = None
+    __slots__ = (
+        "requests",
+        "errors",
+        "response_time_sum",
+        "response_time_min",
+        "response_time_max",
+    )
     
-    def __new__(cls):
-        """Singleton pattern to ensure only one metrics instance."""
-        if cls._instance is None:
-            cls._instance = super(Metrics, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.response_time_sum = 0.0
+        self.response_time_min = float("inf")
+        self.response_time_max = 0.0
+
+
+class Metrics:
+    """Simple metrics collection for the application.
     
-    def _initialize(self):
+    Counters are striped into one cell per thread that records requests,
+    so writers never share mutable state and need no lock. Cells are only
+    summed when metrics are read.
+    """
+    
+    def __init__(self):
         """Initialize metrics storage."""
-        self.metrics = {
-            "requests": 0,
-            "errors": 0,
-            "response_times": [],
-            "endpoints": {},
-            "start_time": time.time()
-        }
+        self._cell_lock = threading.Lock()
+        self.reset_metrics()
+    
+    def _get_cell(self) -> Dict[str, _EndpointStats]:
+        """Get the calling thread's counter cell, creating it on first use."""
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = defaultdict(_EndpointStats)
+            # Only cell registration is synchronized; it happens once per thread
+            with self._cell_lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+        return cell
     
     def track_request(self, endpoint: str, response_time: float, status_code: int):
         """Track a request to an endpoint.
@@ -37,24 +63,30 @@ class Metrics:
             response_time: The time taken to respond in milliseconds
             status_code: The HTTP status code returned
         """
-        self.metrics["requests"] += 1
-        self.metrics["response_times"].append(response_time)
-        
-        # Track by endpoint
-        if endpoint not in self.metrics["endpoints"]:
-            self.metrics["endpoints"][endpoint] = {
-                "requests": 0,
-                "errors": 0,
-                "response_times": [],
-            }
-        
-        self.metrics["endpoints"][endpoint]["requests"] += 1
-        self.metrics["endpoints"][endpoint]["response_times"].append(response_time)
+        stats = self._get_cell()[endpoint]
+        stats.requests += 1
+        stats.response_time_sum += response_time
+        if response_time < stats.response_time_min:
+            stats.response_time_min = response_time
+        if response_time > stats.response_time_max:
+            stats.response_time_max = response_time
         
         # Track errors
         if status_code >= 400:
-            self.metrics["errors"] += 1
-            self.metrics["endpoints"][endpoint]["errors"] += 1
+            stats.errors += 1
+    
+    def _merge_cells(self) -> Dict[str, _EndpointStats]:
+        """Sum all per-thread cells into a single set of endpoint stats."""
+        merged: Dict[str, _EndpointStats] = defaultdict(_EndpointStats)
+        for cell in list(self._cells):
+            for endpoint, stats in list(cell.items()):
+                total = merged[endpoint]
+                total.requests += stats.requests
+                total.errors += stats.errors
+                total.response_time_sum += stats.response_time_sum
+                total.response_time_min = min(total.response_time_min, stats.response_time_min)
+                total.response_time_max = max(total.response_time_max, stats.response_time_max)
+        return merged
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get current metrics with calculated statistics.
@@ -62,36 +94,42 @@ class Metrics:
         Returns:
             Dictionary of metrics
         """
-        uptime = time.time() - self.metrics["start_time"]
-        avg_response_time = sum(self.metrics["response_times"]) / len(self.metrics["response_times"]) if self.metrics["response_times"] else 0
+        uptime = time.time() - self.start_time
+        endpoints = self._merge_cells()
+        total_requests = sum(stats.requests for stats in endpoints.values())
+        total_errors = sum(stats.errors for stats in endpoints.values())
+        total_response_time = sum(stats.response_time_sum for stats in endpoints.values())
         
         result = {
             "uptime_seconds": uptime,
-            "total_requests": self.metrics["requests"],
-            "total_errors": self.metrics["errors"],
-            "error_rate": (self.metrics["errors"] / self.metrics["requests"]) if self.metrics["requests"] > 0 else 0,
-            "avg_response_time_ms": avg_response_time,
+            "total_requests": total_requests,
+            "total_errors": total_errors,
+            "error_rate": (total_errors / total_requests) if total_requests > 0 else 0,
+            "avg_response_time_ms": (total_response_time / total_requests) if total_requests > 0 else 0,
             "endpoints": {}
         }
         
         # Add endpoint statistics
-        for endpoint, data in self.metrics["endpoints"].items():
-            avg_endpoint_time = sum(data["response_times"]) / len(data["response_times"]) if data["response_times"] else 0
+        for endpoint, stats in endpoints.items():
             result["endpoints"][endpoint] = {
-                "requests": data["requests"],
-                "errors": data["errors"],
-                "error_rate": (data["errors"] / data["requests"]) if data["requests"] > 0 else 0,
-                "avg_response_time_ms": avg_endpoint_time
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "error_rate": (stats.errors / stats.requests) if stats.requests > 0 else 0,
+                "avg_response_time_ms": (stats.response_time_sum / stats.requests) if stats.requests > 0 else 0,
+                "min_response_time_ms": stats.response_time_min,
+                "max_response_time_ms": stats.response_time_max
             }
         
         return result
     
     def reset_metrics(self):
         """Reset all metrics."""
-        self._initialize()
+        self._local = threading.local()
+        self._cells: List[Dict[str, _EndpointStats]] = []
+        self.start_time = time.time()
 
 
-# Create metrics instance
+# Application-wide metrics instance; import this rather than constructing Metrics
 metrics = Metrics()
 
 
@@ -117,6 +155,33 @@ def measure_time(func: Callable) -> Callable:
     return wrapper
 
 
+# Longest string value logged per request field; longer values are truncated
+LOG_VALUE_MAX_CHARS = 512
+
+
+def _truncate(value: Any) -> Any:
+    """Truncate long strings for logging, noting their full length."""
+    if isinstance(value, str) and len(value) > LOG_VALUE_MAX_CHARS:
+        return f"{value[:LOG_VALUE_MAX_CHARS]}... ({len(value)} chars)"
+    return value
+
+
+def _serialize_kwargs(kwargs: Dict[str, Any]) -> str:
+    """Serialize request kwargs for logging.
+    
+    Pydantic models are dumped field by field, leaving out the potentially
+    long previous_messages history, instead of going through their repr.
+    Long string values such as the request context are truncated.
+    """
+    return orjson.dumps({
+        k: {
+            field: _truncate(value)
+            for field, value in v.model_dump(mode="json", exclude={"previous_messages"}).items()
+        } if isinstance(v, BaseModel) else _truncate(str(v))
+        for k, v in kwargs.items()
+    }).decode()
+
+
 def log_request(endpoint: str, log_inputs: bool = False) -> Callable:
     """Decorator to log API requests.
     
@@ -133,14 +198,14 @@ def log_request(endpoint: str, log_inputs: bool = False) -> Callable:
             start_time = time.time()
             status_code = 200
             
-            # Log request inputs if enabled
+            # Log request inputs if enabled; skip serializing them when INFO is filtered out
             if log_inputs:
-                # Safely convert args/kwargs to string representation
-                args_str = str(args) if args else ""
-                kwargs_str = json.dumps({k: str(v) for k, v in kwargs.items()}) if kwargs else ""
-                app_logger.info(f"Request to {endpoint}: args={args_str}, kwargs={kwargs_str}")
+                if app_logger.isEnabledFor(logging.INFO):
+                    args_str = str(args) if args else ""
+                    kwargs_str = _serialize_kwargs(kwargs) if kwargs else ""
+                    app_logger.info("Request to %s: args=%s, kwargs=%s", endpoint, args_str, kwargs_str)
             else:
-                app_logger.info(f"Request to {endpoint}")
+                app_logger.info("Request to %s", endpoint)
             
             try:
                 result = await func(*args, **kwargs)
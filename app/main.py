@@ -1,23 +1,61 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi_mcp import FastApiMCP
 
 from app.core.config import get_settings, Settings
 from app.api import api_router
 from app.mcp import mcp_router
 from app.core.monitoring import metrics
-from app.core.logging import app_logger
+from app.core.logging import get_app_logger
+from app.services.question_generation import question_generation_service
+from app.services.vector_db import vector_db_service
+
+# Only endpoints with the 'mcp' tag are exposed as MCP tools
+MCP_INCLUDE_TAGS = ["mcp"]
+
+# Use only operation IDs for tool names, avoiding hyphens
+MCP_INCLUDE_OPERATIONS = [
+    "sequential_questioning",
+    "sequential_questioning_follow_up",
+    "sequential_questioning_automatic",
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the vector collection and warm up the LLM connection.
+    
+    The collection is set up in the background, with retries, so the app
+    serves requests such as health checks while Qdrant is still starting.
+    """
+    collection_setup = asyncio.create_task(vector_db_service.ensure_collection_exists_with_retry())
+    if get_settings().LLM_WARMUP_ON_STARTUP:
+        await question_generation_service.warmup()
+    yield
+    collection_setup.cancel()
+    with suppress(asyncio.CancelledError):
+        await collection_setup
+
 
 # Create FastAPI app
 def create_app() -> FastAPI:
     # Get settings
     settings = get_settings()
     
+    # Configure logging once for the process
+    app_logger = get_app_logger()
+    
     # Initialize application
     app = FastAPI(
         title=settings.APP_NAME,
         description="A Sequential Questioning MCP Server for facilitating multi-round questioning",
         version=settings.APP_VERSION,
         debug=settings.DEBUG,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
     
     # Setup API routes
@@ -30,12 +68,8 @@ def create_app() -> FastAPI:
     mcp = FastApiMCP(
         app,
         name=f"{settings.APP_NAME} MCP",
-        include_tags=["mcp"],  # Only expose endpoints with the 'mcp' tag
-        include_operations=[
-            "sequential_questioning",
-            "sequential_questioning_follow_up",
-            "sequential_questioning_automatic"
-        ]  # Use only operation IDs for tool names, avoiding hyphens
+        include_tags=MCP_INCLUDE_TAGS,
+        include_operations=MCP_INCLUDE_OPERATIONS
     )
     
     # Mount MCP server
@@ -52,4 +86,18 @@ def create_app() -> FastAPI:
     return app
 
 # Create app instance
-app = create_app() 
\ No newline at end of file
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    settings = get_settings()
+    # Run on uvloop/httptools; leave logging to our own queue-based setup
+    uvicorn.run(
+        app,
+        host=settings.HOST,
+        port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        log_config=None,
+    )
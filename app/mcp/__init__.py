@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.mcp.sequential_questioning import router as sequential_questioning_router
+from app.mcp.sequential_questioning import stream_router as sequential_questioning_stream_router
 from app.mcp.monitoring import router as monitoring_router
 
 # Create MCP router
@@ -8,4 +9,5 @@ mcp_router = APIRouter(prefix="/mcp-internal")
 
 # Include specific routers
 mcp_router.include_router(sequential_questioning_router, tags=["mcp"])
+mcp_router.include_router(sequential_questioning_stream_router, tags=["streaming"])
 mcp_router.include_router(monitoring_router, prefix="/monitoring", tags=["monitoring"]) 
\ No newline at end of file
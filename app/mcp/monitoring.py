@@ -1,12 +1,44 @@
+import time
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 from app.core.monitoring import metrics
 from app.core.logging import app_logger
+from app.services.embedding_cache import embedding_cache
+from app.services.query_cache import query_cache
 
 router = APIRouter(tags=["monitoring"])
 
+# How long a computed metrics snapshot is served before being recomputed
+METRICS_CACHE_TTL_SECONDS = 1.0
+
+# (computed at, metrics start_time, snapshot) of the last computed snapshot
+_snapshot_cache: Optional[Tuple[float, float, Dict[str, Any]]] = None
+
+
+def _get_metrics_snapshot() -> Dict[str, Any]:
+    """Get the metrics snapshot, recomputing it at most once per TTL window.
+    
+    The snapshot is also recomputed as soon as the metrics are reset.
+    
+    Returns:
+        Dictionary of metrics
+    """
+    global _snapshot_cache
+    now = time.monotonic()
+    if _snapshot_cache is not None:
+        computed_at, start_time, snapshot = _snapshot_cache
+        if start_time == metrics.start_time and now - computed_at < METRICS_CACHE_TTL_SECONDS:
+            return snapshot
+    snapshot = metrics.get_metrics()
+    snapshot["caches"] = {
+        "embeddings": embedding_cache.stats(),
+        "vector_search": query_cache.stats(),
+    }
+    _snapshot_cache = (now, metrics.start_time, snapshot)
+    return snapshot
+
 
 class MetricsResponse(BaseModel):
     """Response model for metrics endpoint."""
@@ -16,13 +48,14 @@ class MetricsResponse(BaseModel):
     error_rate: float
     avg_response_time_ms: float
     endpoints: Dict[str, Any]
+    caches: Dict[str, Any] = {}
 
 
 @router.get("/metrics", response_model=MetricsResponse)
 async def get_metrics():
     """Get current application metrics."""
     app_logger.info("Retrieving application metrics")
-    return metrics.get_metrics()
+    return _get_metrics_snapshot()
 
 
 @router.post("/metrics/reset")
@@ -1,20 +1,195 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Dict, Any, AsyncIterator, Optional, Callable, Awaitable, TypeVar
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 import asyncio
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+
+import openai
+import orjson
+from tenacity import (
+    RetryCallState,
+    RetryError,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 from app.core.logging import app_logger
 from app.core.monitoring import log_request
-from app.models.database import get_db
+from app.models.database import get_db, get_session_factory
 from app.services.question_generation import question_generation_service
-from app.schemas.question_generation import QuestionRequest, QuestionResponse, MessageItem
+from app.services.response_cache import response_cache
+from app.schemas.question_generation import QuestionRequest, QuestionResponse, MessageItem, QuestionItem
 
 # Create router for sequential questioning MCP
 router = APIRouter()
 
+# Streaming routes; kept off the MCP-tagged router, since MCP tools return a single result
+stream_router = APIRouter()
+
+# Tags and descriptions shared by the MCP route declarations
+_MCP_TAGS = ["mcp"]
+
+_DESC_QUESTION = (
+    "This MCP endpoint generates multiple contextual, sequential questions based "
+    "on conversation history and context, presented in a numbered list format. "
+    "Returns a conversation_id that should be passed in follow-up requests for "
+    "conversation continuity."
+)
+_DESC_FOLLOW_UP = (
+    "This MCP endpoint generates follow-up questions based on the user's answers "
+    "to previous questions, maintaining the conversation context. While "
+    "conversation_id is not required, it is STRONGLY RECOMMENDED to provide it "
+    "for proper conversation continuity. If not provided, a new conversation "
+    "will be created automatically."
+)
+_DESC_STREAM = (
+    "Generates the same batch of sequential questions as /question, streamed as "
+    "server-sent events: a 'question' event per question as soon as it is "
+    "generated, then a 'response' event with the complete response."
+)
+_DESC_AUTOMATIC = (
+    "This MCP endpoint provides a complete question flow, starting with initial "
+    "questions and automatically generating follow-up questions based on user "
+    "responses."
+)
+
+_format_question = "{0.question_number}. {0.question_text}".format
+
+
+def _format_numbered(questions: List[QuestionItem]) -> str:
+    """Format a batch of questions as a numbered list.
+    
+    The question generation service returns questions already ordered by
+    number, so they are formatted in a single pass without sorting.
+    """
+    return "\n".join(map(_format_question, questions))
+
+
+MAX_RETRIES = 3
+
+T = TypeVar("T")
+
+
+# Errors from the LLM API and the database connection that are worth retrying
+_TRANSIENT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    asyncio.TimeoutError,
+    OperationalError,
+    InterfaceError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# Error messages that signal a transient condition regardless of exception type
+_TRANSIENT_MESSAGES = (
+    "Received request before initialization was complete",
+)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Connection, timeout and overload errors are retried; anything else fails fast."""
+    if isinstance(exc, (HTTPException, ValidationError)):
+        return False
+    if isinstance(exc, _TRANSIENT_ERRORS):
+        return True
+    message = str(exc)
+    return any(marker in message for marker in _TRANSIENT_MESSAGES)
+
+
+def _log_retry(retry_state: RetryCallState) -> None:
+    """Log a failed attempt before backing off."""
+    app_logger.warning(
+        f"Attempt {retry_state.attempt_number}/{MAX_RETRIES} failed, retrying",
+        exc_info=retry_state.outcome.exception()
+    )
+
+
+# Exponential backoff with jitter (0.2s, 0.4s, ... capped at 2s) for transient failures
+_retry_transient = retry(
+    stop=stop_after_attempt(MAX_RETRIES),
+    wait=wait_exponential_jitter(initial=0.2, max=2.0),
+    retry=retry_if_exception(_is_transient),
+    before_sleep=_log_retry,
+)
+
+
+async def _run_with_retries(
+    operation: Callable[[], Awaitable[T]],
+    db: AsyncSession,
+    failure_message: str
+) -> T:
+    """Run an operation, retrying transient failures and reporting errors as HTTP 500.
+    
+    After a failed attempt the session is rolled back, which clears the failed
+    transaction and returns its connection to the pool, so a request backing
+    off between attempts does not hold on to a pooled connection.
+    """
+    @_retry_transient
+    async def _attempt() -> T:
+        try:
+            return await operation()
+        except Exception:
+            await db.rollback()
+            raise
+    
+    try:
+        return await _attempt()
+    except HTTPException:
+        raise
+    except RetryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{failure_message} after {MAX_RETRIES} attempts: {str(e.last_attempt.exception())}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{failure_message}: {str(e)}"
+        )
+
+
+async def _run_cached(
+    endpoint: str,
+    request: QuestionRequest,
+    operation: Callable[[], Awaitable[BaseModel]],
+    db: AsyncSession,
+    failure_message: str
+) -> Response:
+    """Serve a cached response for a repeated request, or generate and cache it.
+    
+    Identical requests to the same endpoint within an existing conversation
+    (e.g. client reruns) skip the LLM entirely. A request whose metadata sets
+    "redo" is always regenerated and replaces the cached response. Requests
+    without a conversation_id create a new conversation and are never cached.
+    
+    The response body is serialized once by pydantic's native JSON encoder
+    and returned as is, so FastAPI does not validate and re-encode the
+    response model, and a cache hit is served without parsing.
+    """
+    key = None
+    if response_cache.is_cacheable(request):
+        key = response_cache.make_key(endpoint, request)
+        if not response_cache.is_redo(request):
+            cached = response_cache.get(key)
+            if cached is not None:
+                app_logger.info(f"Serving cached response for {endpoint}")
+                return Response(content=cached, media_type="application/json")
+    
+    response = await _run_with_retries(operation, db, failure_message)
+    body = response.model_dump_json()
+    if key is not None:
+        response_cache.set(key, body)
+    return Response(content=body, media_type="application/json")
+
+
 class EnhancedQuestionRequest(QuestionRequest):
     """Enhanced question request that supports automatic follow-up handling."""
     auto_follow_up: Optional[bool] = Field(
@@ -103,8 +278,8 @@ class AutomaticQuestioningResponse(BaseModel):
     response_model=QuestionResponse,
     operation_id="sequential_questioning",
     summary="Generate a batch of sequential questions based on conversation context",
-    description="This MCP endpoint generates multiple contextual, sequential questions based on conversation history and context, presented in a numbered list format. Returns a conversation_id that should be passed in follow-up requests for conversation continuity.",
-    tags=["mcp"]
+    description=_DESC_QUESTION,
+    tags=_MCP_TAGS
 )
 @log_request(endpoint="sequential_questioning", log_inputs=True)
 async def generate_sequential_question(
@@ -128,57 +303,92 @@ async def generate_sequential_question(
     Returns:
         A response containing generated questions in numbered format and metadata
     """
-    max_retries = 3
-    retry_count = 0
+    async def _call():
+        app_logger.info(f"Processing sequential questioning request with context length: {len(request.context) if request.context else 0}")
+        
+        # Generate the next question using the question generation service
+        response = await question_generation_service.generate_question(db, request)
+        
+        # Format the response to display all questions at once in a numbered list
+        formatted_questions = _format_numbered(response.questions)
+        
+        # Update the response with the formatted questions
+        response.current_question = formatted_questions
+        
+        # Log the conversation ID
+        app_logger.info(f"Generated questions for conversation ID: {response.conversation_id}")
+        
+        return response
+    
+    return await _run_cached(
+        "sequential_questioning", request, _call, db, "Failed to generate question"
+    )
+
+def _sse_event(event: str, data: str) -> str:
+    """Format a server-sent event carrying a JSON payload."""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _stream_question_events(
+    request: QuestionRequest,
+    session_factory: async_sessionmaker[AsyncSession]
+) -> AsyncIterator[str]:
+    """Generate a question batch and emit it as server-sent events.
     
-    while retry_count < max_retries:
+    The stream outlives the request handler, so it uses its own database
+    session, from the given factory, rather than the request-scoped one.
+    """
+    async with session_factory() as db:
         try:
-            app_logger.info(f"Processing sequential questioning request with context length: {len(request.context or '')}")
-            
-            # Generate the next question using the question generation service
-            response = await question_generation_service.generate_question(db, request)
-            
-            # Format the response to display all questions at once in a numbered list
-            formatted_questions = "\n".join([
-                f"{q.question_number}. {q.question_text}" 
-                for q in sorted(response.questions, key=lambda x: x.question_number)
-            ])
-            
-            # Update the response with the formatted questions
-            response.current_question = formatted_questions
-            
-            # Log the conversation ID
-            app_logger.info(f"Generated questions for conversation ID: {response.conversation_id}")
-            
-            return response
-            
+            async for item in question_generation_service.generate_question_stream(db, request):
+                if isinstance(item, QuestionItem):
+                    yield _sse_event("question", item.model_dump_json())
+                else:
+                    item.current_question = _format_numbered(item.questions)
+                    yield _sse_event("response", item.model_dump_json())
+            await db.commit()
         except Exception as e:
-            retry_count += 1
-            app_logger.exception(f"Error in sequential questioning endpoint (attempt {retry_count}/{max_retries}): {str(e)}")
-            
-            if "Received request before initialization was complete" in str(e):
-                # This is a timing issue with the MCP connection, retry after a delay
-                app_logger.warning(f"MCP initialization timing issue detected, retrying after delay...")
-                await asyncio.sleep(1)  # Add a 1-second delay before retrying
-                continue
-                
-            if retry_count >= max_retries:
-                # If we've exhausted our retries, raise the exception
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to generate question after {max_retries} attempts: {str(e)}"
-                )
-            
-            # Add exponential backoff for other errors
-            await asyncio.sleep(0.5 * (2 ** (retry_count - 1)))  # 0.5s, 1s, 2s, etc.
+            await db.rollback()
+            app_logger.exception(f"Error streaming questions: {str(e)}")
+            yield _sse_event("error", orjson.dumps({"detail": f"Failed to generate question: {str(e)}"}).decode())
+
+
+@stream_router.post(
+    "/question/stream",
+    operation_id="sequential_questioning_stream",
+    summary="Stream a batch of sequential questions as server-sent events",
+    description=_DESC_STREAM,
+    response_class=StreamingResponse
+)
+@log_request(endpoint="sequential_questioning_stream", log_inputs=True)
+async def stream_sequential_question(
+    request: QuestionRequest,
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory)
+):
+    """Stream sequential questions as they are generated.
+    
+    Clients that render questions incrementally get the first one after the
+    LLM has produced it, instead of after the whole batch has been generated
+    and stored.
+    
+    Args:
+        request: The question generation request containing context and previous messages
+        session_factory: Factory for the database session the stream uses
+    
+    Returns:
+        A text/event-stream response of question events and a final response event
+    """
+    return StreamingResponse(
+        _stream_question_events(request, session_factory), media_type="text/event-stream"
+    )
 
 @router.post(
     "/question/follow-up", 
     response_model=QuestionResponse,
     operation_id="sequential_questioning_follow_up",
     summary="Generate follow-up questions based on user's answers to previous questions",
-    description="This MCP endpoint generates follow-up questions based on the user's answers to previous questions, maintaining the conversation context. While conversation_id is not required, it is STRONGLY RECOMMENDED to provide it for proper conversation continuity. If not provided, a new conversation will be created automatically.",
-    tags=["mcp"]
+    description=_DESC_FOLLOW_UP,
+    tags=_MCP_TAGS
 )
 @log_request(endpoint="sequential_questioning_follow_up", log_inputs=True)
 async def generate_follow_up_questions(
@@ -204,79 +414,57 @@ async def generate_follow_up_questions(
         - If conversation_id is not provided, a new conversation will be created
         - previous_messages are required for this endpoint
     """
-    max_retries = 3
-    retry_count = 0
-    
-    while retry_count < max_retries:
-        try:
-            app_logger.info(f"Processing follow-up questions request with conversation_id: {request.conversation_id}")
-            
-            # Check if we have previous messages (required for follow-up questions)
-            if not request.previous_messages or len(request.previous_messages) == 0:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="previous_messages with user answers are required for follow-up questions"
-                )
-            
-            # If no conversation_id is provided, treat it as a new conversation
-            if not request.conversation_id:
-                app_logger.info("No conversation_id provided for follow-up, creating a new conversation")
-                # Create a new request object with the same data
-                initial_request = QuestionRequest(
-                    user_id=request.user_id,
-                    context=request.context or "Follow-up conversation",  # Ensure we have some context
-                    previous_messages=[],  # Start fresh for the initial question
-                    session_id=request.session_id,
-                    metadata=request.metadata
-                )
-                # Generate initial questions which will create a new conversation
-                initial_response = await question_generation_service.generate_question(db, initial_request)
-                # Update the request with the new IDs
-                request.conversation_id = initial_response.conversation_id
-                request.session_id = initial_response.session_id
-                
-                app_logger.info(f"Created new conversation with ID {request.conversation_id} for follow-up questions")
-            
-            # Now generate the actual follow-up questions
-            response = await question_generation_service.generate_question(db, request)
-            
-            # Format the response to display all questions at once in a numbered list
-            formatted_questions = "\n".join([
-                f"{q.question_number}. {q.question_text}" 
-                for q in sorted(response.questions, key=lambda x: x.question_number)
-            ])
-            
-            # Update the response with the formatted questions
-            response.current_question = formatted_questions
-            
-            # Log the conversation ID to help troubleshoot
-            app_logger.info(f"Returning follow-up questions for conversation ID: {response.conversation_id}")
-            
-            return response
-            
-        except HTTPException:
-            # Re-raise validation errors without retry
-            raise
-        except Exception as e:
-            retry_count += 1
-            app_logger.exception(f"Error in follow-up questions endpoint (attempt {retry_count}/{max_retries}): {str(e)}")
-            
-            if retry_count >= max_retries:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to generate follow-up questions after {max_retries} attempts: {str(e)}"
-                )
+    async def _call():
+        app_logger.info(f"Processing follow-up questions request with conversation_id: {request.conversation_id}")
+        
+        # Check if we have previous messages (required for follow-up questions)
+        if not request.previous_messages or len(request.previous_messages) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="previous_messages with user answers are required for follow-up questions"
+            )
+        
+        # If no conversation_id is provided, treat it as a new conversation
+        if not request.conversation_id:
+            app_logger.info("No conversation_id provided for follow-up, creating a new conversation")
+            # Copy the request without re-validating it, starting fresh for the initial question
+            initial_request = request.model_copy(update={
+                "previous_messages": [],
+                "context": request.context or "Follow-up conversation"  # Ensure we have some context
+            })
+            # Generate initial questions which will create a new conversation
+            initial_response = await question_generation_service.generate_question(db, initial_request)
+            # Update the request with the new IDs
+            request.conversation_id = initial_response.conversation_id
+            request.session_id = initial_response.session_id
             
-            # Add exponential backoff for errors
-            await asyncio.sleep(0.5 * (2 ** (retry_count - 1)))
+            app_logger.info(f"Created new conversation with ID {request.conversation_id} for follow-up questions")
+        
+        # Now generate the actual follow-up questions
+        response = await question_generation_service.generate_question(db, request)
+        
+        # Format the response to display all questions at once in a numbered list
+        formatted_questions = _format_numbered(response.questions)
+        
+        # Update the response with the formatted questions
+        response.current_question = formatted_questions
+        
+        # Log the conversation ID to help troubleshoot
+        app_logger.info(f"Returning follow-up questions for conversation ID: {response.conversation_id}")
+        
+        return response
+    
+    return await _run_cached(
+        "sequential_questioning_follow_up", request, _call, db, "Failed to generate follow-up questions"
+    )
 
 @router.post(
     "/question/automatic",
     response_model=AutomaticQuestioningResponse,
     operation_id="sequential_questioning_automatic",
     summary="Generate questions and automatic follow-ups based on user answers",
-    description="This MCP endpoint provides a complete question flow, starting with initial questions and automatically generating follow-up questions based on user responses.",
-    tags=["mcp"]
+    description=_DESC_AUTOMATIC,
+    tags=_MCP_TAGS
 )
 @log_request(endpoint="sequential_questioning_automatic", log_inputs=True)
 async def automatic_sequential_questioning(
@@ -297,108 +485,94 @@ async def automatic_sequential_questioning(
     Returns:
         A response containing all questions from all rounds
     """
-    max_retries = 3
-    retry_count = 0
+    # Timestamp the request once, rather than on every retry attempt
+    requested_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
     
-    while retry_count < max_retries:
-        try:
-            app_logger.info(f"Processing automatic questioning request with context length: {len(request.context or '')}")
-            
-            # Generate initial questions
-            initial_questions = await question_generation_service.generate_question(db, request)
+    async def _call():
+        app_logger.info(f"Processing automatic questioning request with context length: {len(request.context) if request.context else 0}")
+        
+        # Generate initial questions
+        initial_questions = await question_generation_service.generate_question(db, request)
+        
+        # Log the conversation ID
+        app_logger.info(f"Created/retrieved conversation ID: {initial_questions.conversation_id} for automatic questioning")
+        
+        # Format initial questions
+        initial_formatted = _format_numbered(initial_questions.questions)
+        initial_questions.current_question = initial_formatted
+        
+        # Initialize follow-up rounds; formatted blocks are kept for the combined output
+        follow_up_rounds = []
+        formatted_blocks = [initial_formatted] if initial_formatted else []
+        total_questions = len(initial_questions.questions)
+        
+        # If there are previous messages and we need to generate follow-ups
+        if (request.previous_messages and 
+            len(request.previous_messages) > 0 and 
+            initial_questions.next_batch_needed and 
+            request.auto_handle_follow_up):
             
-            # Log the conversation ID
-            app_logger.info(f"Created/retrieved conversation ID: {initial_questions.conversation_id} for automatic questioning")
+            # Maximum number of rounds; the request schema already caps it at 3.
+            # The field is nullable, so fall back to its default when unset.
+            max_rounds = request.max_rounds or AutomaticQuestioningRequest.model_fields["max_rounds"].default
             
-            # Format initial questions
-            initial_formatted = "\n".join([
-                f"{q.question_number}. {q.question_text}" 
-                for q in sorted(initial_questions.questions, key=lambda x: x.question_number)
-            ])
-            initial_questions.current_question = initial_formatted
+            # Use the same conversation and session IDs. Only the plain request
+            # fields are carried over, as their own copies; the inbound request
+            # is already validated, so the follow-up skips validation.
+            follow_up_request = QuestionRequest.model_construct(
+                conversation_id=initial_questions.conversation_id,  # Ensure conversation continuity
+                session_id=initial_questions.session_id,
+                context=request.context,
+                previous_messages=list(request.previous_messages),
+                metadata=dict(request.metadata) if request.metadata is not None else None
+            )
             
-            # Initialize follow-up questions list
-            follow_up_rounds = []
-            all_questions = list(initial_questions.questions)
+            app_logger.info(f"Using conversation ID: {follow_up_request.conversation_id} for follow-up rounds")
             
-            # If there are previous messages and we need to generate follow-ups
-            if (request.previous_messages and 
-                len(request.previous_messages) > 0 and 
-                initial_questions.next_batch_needed and 
-                request.auto_handle_follow_up):
+            # Generate follow-up questions for each remaining round
+            for _ in range(max_rounds - 1):
+                # Generate follow-up questions
+                follow_up = await question_generation_service.generate_question(db, follow_up_request)
                 
-                # Maximum number of follow-up rounds
-                max_rounds = min(request.max_rounds, 3)  # Cap at 3 to prevent excessive rounds
-                current_round = 1
+                # Format follow-up questions
+                follow_up_formatted = _format_numbered(follow_up.questions)
+                follow_up.current_question = follow_up_formatted
                 
-                # Use the same conversation and session IDs
-                follow_up_request = QuestionRequest(
-                    conversation_id=initial_questions.conversation_id,  # Ensure conversation continuity
-                    session_id=initial_questions.session_id,
-                    context=request.context,
-                    previous_messages=request.previous_messages,
-                    metadata=request.metadata
-                )
+                # Add to follow-up rounds and running totals
+                follow_up_rounds.append(follow_up)
+                if follow_up_formatted:
+                    formatted_blocks.append(follow_up_formatted)
+                total_questions += len(follow_up.questions)
                 
-                app_logger.info(f"Using conversation ID: {follow_up_request.conversation_id} for follow-up rounds")
-                
-                # Generate follow-up questions for each round
-                while current_round < max_rounds and initial_questions.next_batch_needed:
-                    # Generate follow-up questions
-                    follow_up = await question_generation_service.generate_question(db, follow_up_request)
-                    
-                    # Format follow-up questions
-                    follow_up_formatted = "\n".join([
-                        f"{q.question_number}. {q.question_text}" 
-                        for q in sorted(follow_up.questions, key=lambda x: x.question_number)
-                    ])
-                    follow_up.current_question = follow_up_formatted
-                    
-                    # Add to follow-up rounds and all questions
-                    follow_up_rounds.append(follow_up)
-                    all_questions.extend(follow_up.questions)
-                    
-                    # Check if we need more follow-up rounds
-                    if not follow_up.next_batch_needed:
-                        break
-                    
-                    current_round += 1
-            
-            # Combine all questions into one formatted string
-            all_questions_combined = "\n".join([
-                f"{q.question_number}. {q.question_text}" 
-                for q in sorted(all_questions, key=lambda x: x.question_number)
-            ])
-            
-            # Create response with conversation ID clearly included
-            response = AutomaticQuestioningResponse(
-                initial_questions=initial_questions,
-                follow_up_questions=follow_up_rounds if follow_up_rounds else None,
-                all_questions_combined=all_questions_combined,  # All questions together in a numbered list
-                conversation_id=initial_questions.conversation_id,
-                session_id=initial_questions.session_id,
-                total_questions=len(all_questions),
-                metadata={
-                    "rounds_generated": 1 + len(follow_up_rounds),
-                    "timestamp": datetime.now().isoformat(),
-                    "auto_follow_up": request.auto_handle_follow_up,
-                    "conversation_id": initial_questions.conversation_id  # Include in metadata too for clarity
-                }
-            )
-            
-            app_logger.info(f"Returning automatic questioning response with conversation ID: {response.conversation_id}")
-            
-            return response
-            
-        except Exception as e:
-            retry_count += 1
-            app_logger.exception(f"Error in automatic questioning endpoint (attempt {retry_count}/{max_retries}): {str(e)}")
-            
-            if retry_count >= max_retries:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to generate automatic question flow after {max_retries} attempts: {str(e)}"
-                )
-            
-            # Add exponential backoff for errors
-            await asyncio.sleep(0.5 * (2 ** (retry_count - 1))) 
\ No newline at end of file
+                # Stop as soon as the latest round says no more questions are needed
+                if not follow_up.next_batch_needed:
+                    break
+        
+        # Combine all questions into one formatted string. Each round continues
+        # the numbering of the previous one, so the already formatted (and
+        # ordered) blocks can be concatenated without sorting again.
+        all_questions_combined = "\n".join(formatted_blocks)
+        
+        # Create response with conversation ID clearly included
+        response = AutomaticQuestioningResponse(
+            initial_questions=initial_questions,
+            follow_up_questions=follow_up_rounds if follow_up_rounds else None,
+            all_questions_combined=all_questions_combined,  # All questions together in a numbered list
+            conversation_id=initial_questions.conversation_id,
+            session_id=initial_questions.session_id,
+            total_questions=total_questions,
+            metadata={
+                "rounds_generated": str(1 + len(follow_up_rounds)),
+                "timestamp": requested_at,
+                "auto_follow_up": "true" if request.auto_handle_follow_up else "false",
+                "conversation_id": initial_questions.conversation_id  # Include in metadata too for clarity
+            }
+        )
+        
+        app_logger.info(f"Returning automatic questioning response with conversation ID: {response.conversation_id}")
+        
+        return response
+    
+    return await _run_cached(
+        "sequential_questioning_automatic", request, _call, db, "Failed to generate automatic question flow"
+    )
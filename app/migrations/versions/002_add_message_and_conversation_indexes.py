@@ -0,0 +1,28 @@
+"""add message and conversation indexes
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-15 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ordered reads of a conversation's messages
+    op.create_index('ix_messages_conv_seq', 'messages', ['conversation_id', 'sequence_number'], unique=False)
+    # Conversation lookups by user session
+    op.create_index(op.f('ix_conversations_user_session_id'), 'conversations', ['user_session_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_conversations_user_session_id'), table_name='conversations')
+    op.drop_index('ix_messages_conv_seq', table_name='messages')
@@ -0,0 +1,89 @@
+"""store ids as uuids
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-15 11:00:00.000000
+
+"""
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+# ID columns per table, holding UUIDs
+UUID_COLUMNS = {
+    'user_sessions': ['id'],
+    'conversations': ['id', 'user_session_id'],
+    'messages': ['id', 'conversation_id'],
+}
+
+# Foreign keys created unnamed by revision 001, under PostgreSQL's default names
+FOREIGN_KEYS = [
+    ('conversations_user_session_id_fkey', 'conversations', 'user_sessions', 'user_session_id'),
+    ('messages_conversation_id_fkey', 'messages', 'conversations', 'conversation_id'),
+]
+
+
+def _convert_sqlite_values(table: str, columns: list, convert) -> None:
+    """Rewrite the ID values of a SQLite table row by row."""
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(f"SELECT rowid, {', '.join(columns)} FROM {table}")).fetchall()
+    assignments = ', '.join(f"{column} = :{column}" for column in columns)
+    for rowid, *values in rows:
+        params = {column: convert(value) for column, value in zip(columns, values)}
+        bind.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE rowid = :rowid"), {"rowid": rowid, **params})
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, _, _ in FOREIGN_KEYS:
+            op.drop_constraint(name, table, type_='foreignkey')
+        for table, columns in UUID_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table, column,
+                    type_=postgresql.UUID(as_uuid=False),
+                    existing_type=sa.String(),
+                    postgresql_using=f'{column}::uuid'
+                )
+        for name, table, referent, column in FOREIGN_KEYS:
+            op.create_foreign_key(name, table, referent, [column], ['id'])
+    else:
+        # SQLite has no native UUID type; store the 16 raw bytes. Values are
+        # converted before the column type changes, since the table copy made
+        # by the type change would cast the UUID strings to their text bytes.
+        for table, columns in UUID_COLUMNS.items():
+            _convert_sqlite_values(table, columns, lambda value: UUID(value).bytes)
+            with op.batch_alter_table(table) as batch_op:
+                for column in columns:
+                    batch_op.alter_column(column, type_=sa.LargeBinary(16), existing_type=sa.String())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, table, _, _ in FOREIGN_KEYS:
+            op.drop_constraint(name, table, type_='foreignkey')
+        for table, columns in UUID_COLUMNS.items():
+            for column in columns:
+                op.alter_column(
+                    table, column,
+                    type_=sa.String(),
+                    existing_type=postgresql.UUID(as_uuid=False),
+                    postgresql_using=f'{column}::text'
+                )
+        for name, table, referent, column in FOREIGN_KEYS:
+            op.create_foreign_key(name, table, referent, [column], ['id'])
+    else:
+        for table, columns in UUID_COLUMNS.items():
+            _convert_sqlite_values(table, columns, lambda value: str(UUID(bytes=bytes(value))))
+            with op.batch_alter_table(table) as batch_op:
+                for column in columns:
+                    batch_op.alter_column(column, type_=sa.String(), existing_type=sa.LargeBinary(16))
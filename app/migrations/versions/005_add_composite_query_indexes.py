@@ -0,0 +1,37 @@
+"""add composite query indexes
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-15 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ordered reads of a conversation's messages of one type
+    op.create_index(
+        'ix_messages_conv_type_seq', 'messages',
+        ['conversation_id', 'message_type', 'sequence_number'], unique=False
+    )
+    # Newest active conversation of a user session; its leading column also
+    # serves plain lookups by user session, replacing the single-column index
+    op.create_index(
+        'ix_conv_user_active_created', 'conversations',
+        ['user_session_id', 'is_active', 'created_at'], unique=False
+    )
+    op.drop_index(op.f('ix_conversations_user_session_id'), table_name='conversations')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_conversations_user_session_id'), 'conversations', ['user_session_id'], unique=False)
+    op.drop_index('ix_conv_user_active_created', table_name='conversations')
+    op.drop_index('ix_messages_conv_type_seq', table_name='messages')
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from uuid import uuid4
 
 from app.models.database import Base
+from app.models.types import GUID
 
 
 class Conversation(Base):
@@ -13,9 +14,13 @@ class Conversation(Base):
     within a user session.
     """
     __tablename__ = "conversations"
+    __table_args__ = (
+        # Serves lookups by user session and the newest active conversation
+        Index("ix_conv_user_active_created", "user_session_id", "is_active", "created_at"),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
-    user_session_id = Column(String, ForeignKey("user_sessions.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=lambda: str(uuid4()))
+    user_session_id = Column(GUID, ForeignKey("user_sessions.id"), nullable=False)
     topic = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
@@ -1,7 +1,8 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import AsyncGenerator
 import os
 
 # Get database URL from environment variable
@@ -23,37 +24,90 @@ else:
     # PostgreSQL or other database
     ASYNC_DATABASE_URL = DATABASE_URL
 
+# Connection pool sizing; connections are kept open between requests
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+# Compiled SQL statements cached per engine, so repeated queries skip compilation
+DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+
+_async_url = make_url(ASYNC_DATABASE_URL)
+IS_SQLITE = _async_url.get_backend_name() == "sqlite"
+
+# In-memory SQLite, by name or as a mode=memory URI
+_IS_MEMORY_DB = IS_SQLITE and (
+    _async_url.database in (None, "", ":memory:") or _async_url.query.get("mode") == "memory"
+)
+
+engine_options = {}
+if IS_SQLITE:
+    engine_options["connect_args"] = {"check_same_thread": False}
+if not _IS_MEMORY_DB:
+    # In-memory SQLite uses a single static connection, so pool sizing does not apply
+    engine_options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+if not IS_SQLITE:
+    engine_options.update(pool_pre_ping=True, pool_recycle=DB_POOL_RECYCLE)
+
 # Create async engine
 engine = create_async_engine(
     ASYNC_DATABASE_URL,
     echo=False,
     future=True,
+    query_cache_size=DB_QUERY_CACHE_SIZE,
+    **engine_options,
 )
 
-# Create sync engine for Alembic
-sync_engine = create_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-)
+if IS_SQLITE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new pooled SQLite connection.
+        
+        WAL keeps readers from blocking on the writer and, with NORMAL sync,
+        avoids an fsync per commit. The page cache (64 MiB), memory-mapped
+        I/O (256 MiB) and in-memory temp storage keep hot pages out of
+        syscalls, and foreign keys are enforced as on PostgreSQL.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
-# Create session factory
-async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
+# Create session factory. Alembic builds its own synchronous engine in
+# app/migrations/env.py, so none is created here.
+async_session = async_sessionmaker(
+    engine, expire_on_commit=False, autoflush=False
 )
 
 # Create base class for models
 Base = declarative_base()
 
 
+# Dependency to get the session factory, for work that outlives a request
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get the factory for sessions not tied to a request.
+    
+    Responses streamed after the handler returns open their own session
+    from it; tests override it to keep that work on the test database.
+    """
+    return async_session
+
+
 # Dependency to get database session
-async def get_db():
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Yield a database session for a request.
+    
+    Kept as an async generator so FastAPI awaits it on the event loop
+    instead of dispatching it to the threadpool. The session is closed
+    by the ``async with`` block.
+    """
     async with async_session() as session:
         try:
             yield session
             await session.commit()
         except Exception:
             await session.rollback()
-            raise
-        finally:
-            await session.close() 
\ No newline at end of file
+            raise 
\ No newline at end of file
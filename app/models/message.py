@@ -1,10 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer, Text, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Integer, Text, Enum, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from uuid import uuid4
 import enum
 
 from app.models.database import Base
+from app.models.types import GUID
 
 
 class MessageType(str, enum.Enum):
@@ -20,12 +22,16 @@ class Message(Base):
     A message can be a question or an answer within a conversation.
     """
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conv_seq", "conversation_id", "sequence_number"),
+        Index("ix_messages_conv_type_seq", "conversation_id", "message_type", "sequence_number"),
+    )
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
-    conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
+    id = Column(GUID, primary_key=True, default=lambda: str(uuid4()))
+    conversation_id = Column(GUID, ForeignKey("conversations.id"), nullable=False)
     message_type = Column(String, nullable=False)
     content = Column(Text, nullable=False)
-    message_metadata = Column(Text, nullable=True)  # JSON string for additional metadata
+    message_metadata = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)  # Additional metadata
     sequence_number = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,49 @@
+from typing import Any, Optional
+from uuid import UUID
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.types import TypeDecorator
+
+
+def is_valid_uuid(value: Any) -> bool:
+    """Check whether a value can be stored in a GUID column."""
+    if isinstance(value, UUID):
+        return True
+    try:
+        UUID(str(value))
+    except ValueError:
+        return False
+    return True
+
+
+class GUID(TypeDecorator):
+    """UUID column exposed to Python as its canonical string form.
+
+    Stored as a native UUID on PostgreSQL and as 16 raw bytes elsewhere,
+    instead of a 36-character string, which keeps primary and foreign key
+    indexes compact.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value: Any, dialect) -> Optional[Any]:
+        if value is None:
+            return None
+        uuid = value if isinstance(value, UUID) else UUID(str(value))
+        if dialect.name == "postgresql":
+            return str(uuid)
+        return uuid.bytes
+
+    def process_result_value(self, value: Any, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        if dialect.name == "postgresql":
+            return str(value)
+        return str(UUID(bytes=bytes(value)))
@@ -5,6 +5,7 @@ from sqlalchemy.orm import relationship
 from uuid import uuid4
 
 from app.models.database import Base
+from app.models.types import GUID
 
 
 class UserSession(Base):
@@ -15,7 +16,7 @@ class UserSession(Base):
     """
     __tablename__ = "user_sessions"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid4()))
+    id = Column(GUID, primary_key=True, default=lambda: str(uuid4()))
     user_identifier = Column(String, nullable=True, index=True)
     context = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
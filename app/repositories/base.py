@@ -1,9 +1,10 @@
 from typing import Generic, TypeVar, Type, List, Optional, Any, Dict, Union
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete, exists, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 from app.models.database import Base
+from app.models.types import is_valid_uuid
 
 # Type variable for SQLAlchemy models
 ModelType = TypeVar("ModelType", bound=Base)
@@ -25,15 +26,20 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     async def get(self, db: AsyncSession, id: str) -> Optional[ModelType]:
         """Get a single record by ID."""
-        query = select(self.model).where(self.model.id == id)
-        result = await db.execute(query)
-        return result.scalars().first()
+        if not is_valid_uuid(id):
+            # IDs are UUIDs, so a malformed ID cannot match any record
+            return None
+        # Served from the session's identity map without SQL when already loaded
+        return await db.get(self.model, id)
     
     async def get_multi(
         self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
         """Get multiple records with pagination."""
-        query = select(self.model).offset(skip).limit(limit)
+        # lambda_stmt caches the built statement per call site; only the
+        # closure values (the model and the paging) vary between calls
+        model = self.model
+        query = lambda_stmt(lambda: select(model).offset(skip).limit(limit))
         result = await db.execute(query)
         return result.scalars().all()
     
@@ -50,6 +56,23 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
     
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: List[Union[CreateSchemaType, Dict[str, Any]]]
+    ) -> List[ModelType]:
+        """Create several records in one INSERT ... RETURNING and a single commit."""
+        if not objs_in:
+            return []
+        obj_data = [
+            obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+            for obj_in in objs_in
+        ]
+        # Rows come back in the order given, so results line up with objs_in
+        query = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        result = await db.execute(query, obj_data)
+        db_objs = list(result.scalars().all())
+        await db.commit()
+        return db_objs
+    
     async def update(
         self, db: AsyncSession, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
@@ -59,24 +82,49 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
             
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-            
-        db.add(db_obj)
+        if not update_data:
+            return db_obj
+        # UPDATE ... RETURNING brings back server-set columns such as updated_at
+        # in the same round trip, instead of a commit followed by a refresh
+        query = (
+            update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(synchronize_session="fetch")
+        )
+        result = await db.execute(query)
+        db_obj = result.scalars().one()
         await db.commit()
-        await db.refresh(db_obj)
         return db_obj
     
     async def delete(self, db: AsyncSession, *, id: str) -> Optional[ModelType]:
         """Delete a record by ID."""
-        obj = await self.get(db=db, id=id)
-        if obj:
-            await db.delete(obj)
-            await db.commit()
+        if not is_valid_uuid(id):
+            return None
+        if any(rel.cascade.delete for rel in self.model.__mapper__.relationships):
+            # ORM delete cascades to child rows, which a bulk DELETE would skip
+            obj = await self.get(db=db, id=id)
+            if obj:
+                await db.delete(obj)
+                await db.commit()
+            return obj
+        # A single DELETE ... RETURNING instead of a SELECT followed by a DELETE
+        query = delete(self.model).where(self.model.id == id).returning(self.model)
+        result = await db.execute(query)
+        obj = result.scalars().first()
+        await db.commit()
+        if obj is not None:
+            # The row RETURNING loaded is gone; detach it as an ORM delete would
+            db.expunge(obj)
         return obj
     
     async def exists(self, db: AsyncSession, *, id: str) -> bool:
         """Check if a record exists by ID."""
-        query = select(self.model).where(self.model.id == id)
+        if not is_valid_uuid(id):
+            return False
+        # SELECT EXISTS(...) fetches no columns and loads no entity
+        model = self.model
+        query = lambda_stmt(lambda: select(exists().where(model.id == id)))
         result = await db.execute(query)
-        return result.scalars().first() is not None 
\ No newline at end of file
+        return bool(result.scalar()) 
\ No newline at end of file
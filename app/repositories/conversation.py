@@ -1,9 +1,11 @@
 from typing import List, Optional
-from sqlalchemy import select
+from sqlalchemy import select, update, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.conversation import Conversation
 from app.schemas.conversation import ConversationCreate, ConversationUpdate
+from app.models.types import is_valid_uuid
 from app.repositories.base import BaseRepository
 
 
@@ -13,13 +15,25 @@ class ConversationRepository(BaseRepository[Conversation, ConversationCreate, Co
     def __init__(self):
         super().__init__(Conversation)
     
+    async def get_with_messages(self, db: AsyncSession, *, id: str) -> Optional[Conversation]:
+        """Get a conversation with its messages loaded in one extra query."""
+        if not is_valid_uuid(id):
+            return None
+        model = self.model
+        query = lambda_stmt(lambda: select(model).options(
+            selectinload(model.messages)
+        ).where(model.id == id))
+        result = await db.execute(query)
+        return result.scalars().first()
+    
     async def get_by_user_session_id(
         self, db: AsyncSession, *, user_session_id: str, skip: int = 0, limit: int = 100
     ) -> List[Conversation]:
         """Get conversations by user session ID."""
-        query = select(self.model).where(
-            self.model.user_session_id == user_session_id
-        ).offset(skip).limit(limit)
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.user_session_id == user_session_id
+        ).offset(skip).limit(limit))
         result = await db.execute(query)
         return result.scalars().all()
     
@@ -27,19 +41,26 @@ class ConversationRepository(BaseRepository[Conversation, ConversationCreate, Co
         self, db: AsyncSession, *, user_session_id: str
     ) -> Optional[Conversation]:
         """Get active conversation by user session ID."""
-        query = select(self.model).where(
-            self.model.user_session_id == user_session_id,
-            self.model.is_active == True
-        ).order_by(self.model.created_at.desc())
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.user_session_id == user_session_id,
+            model.is_active == True
+        ).order_by(model.created_at.desc()).limit(1))
         result = await db.execute(query)
         return result.scalars().first()
     
     async def deactivate_conversation(self, db: AsyncSession, *, id: str) -> Optional[Conversation]:
         """Deactivate a conversation."""
-        conversation = await self.get(db=db, id=id)
-        if conversation:
-            conversation.is_active = False
-            db.add(conversation)
-            await db.commit()
-            await db.refresh(conversation)
+        if not is_valid_uuid(id):
+            return None
+        # A single UPDATE ... RETURNING instead of loading the row first
+        query = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(is_active=False)
+            .returning(self.model)
+        )
+        result = await db.execute(query)
+        conversation = result.scalars().first()
+        await db.commit()
         return conversation 
\ No newline at end of file
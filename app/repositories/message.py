@@ -1,11 +1,14 @@
-from typing import List, Optional
-from sqlalchemy import select, func
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, insert, select, func, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.message import Message
 from app.schemas.message import MessageCreate, MessageUpdate
 from app.repositories.base import BaseRepository
 
+# Rows fetched per round trip when streaming a conversation's messages
+STREAM_BATCH_SIZE = 200
+
 
 class MessageRepository(BaseRepository[Message, MessageCreate, MessageUpdate]):
     """Repository for message operations."""
@@ -17,48 +20,128 @@ class MessageRepository(BaseRepository[Message, MessageCreate, MessageUpdate]):
         self, db: AsyncSession, *, conversation_id: str, skip: int = 0, limit: int = 100
     ) -> List[Message]:
         """Get messages by conversation ID, ordered by sequence number."""
-        query = select(self.model).where(
-            self.model.conversation_id == conversation_id
-        ).order_by(self.model.sequence_number).offset(skip).limit(limit)
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.conversation_id == conversation_id
+        ).order_by(model.sequence_number).offset(skip).limit(limit))
         result = await db.execute(query)
         return result.scalars().all()
     
+    async def iter_by_conversation_id(
+        self, db: AsyncSession, *, conversation_id: str
+    ) -> AsyncIterator[Message]:
+        """Stream all messages of a conversation, ordered by sequence number.
+        
+        Rows are fetched in batches of STREAM_BATCH_SIZE, so memory stays
+        bounded however long the conversation is.
+        """
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.conversation_id == conversation_id
+        ).order_by(model.sequence_number))
+        result = await db.stream_scalars(query, execution_options={"yield_per": STREAM_BATCH_SIZE})
+        async for message in result:
+            yield message
+    
+    async def get_page_with_total(
+        self, db: AsyncSession, *, conversation_id: str, skip: int = 0, limit: int = 100
+    ) -> Tuple[List[Message], int]:
+        """Get a page of a conversation's messages together with their total count.
+        
+        The total comes from a count(*) OVER () window on the same query, so a
+        paginated read takes one round trip instead of a page query plus a count.
+        """
+        model = self.model
+        query = lambda_stmt(lambda: select(model, func.count().over().label("total")).where(
+            model.conversation_id == conversation_id
+        ).order_by(model.sequence_number).offset(skip).limit(limit))
+        result = await db.execute(query)
+        rows = result.all()
+        if not rows:
+            # A page past the end carries no window value to read the total from
+            total = await self.count_by_conversation(db, conversation_id=conversation_id) if skip else 0
+            return [], total
+        return [row[0] for row in rows], rows[0].total
+    
     async def get_by_conversation_id_and_type(
         self, db: AsyncSession, *, conversation_id: str, message_type: str, skip: int = 0, limit: int = 100
     ) -> List[Message]:
         """Get messages by conversation ID and message type."""
-        query = select(self.model).where(
-            self.model.conversation_id == conversation_id,
-            self.model.message_type == message_type
-        ).order_by(self.model.sequence_number).offset(skip).limit(limit)
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.conversation_id == conversation_id,
+            model.message_type == message_type
+        ).order_by(model.sequence_number).offset(skip).limit(limit))
         result = await db.execute(query)
         return result.scalars().all()
     
     async def get_latest_message(self, db: AsyncSession, *, conversation_id: str) -> Optional[Message]:
         """Get the latest message in a conversation."""
-        query = select(self.model).where(
-            self.model.conversation_id == conversation_id
-        ).order_by(self.model.sequence_number.desc())
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(
+            model.conversation_id == conversation_id
+        ).order_by(model.sequence_number.desc()).limit(1))
         result = await db.execute(query)
         return result.scalars().first()
     
     async def get_next_sequence_number(self, db: AsyncSession, *, conversation_id: str) -> int:
-        """Get the next sequence number for a message in a conversation."""
-        latest_message = await self.get_latest_message(db=db, conversation_id=conversation_id)
-        if latest_message:
-            return latest_message.sequence_number + 1
-        return 1 
+        """Get the next sequence number for a message in a conversation.
+        
+        Computed as MAX + 1 in the database, answered from the
+        (conversation_id, sequence_number) index without loading a message.
+        """
+        model = self.model
+        query = lambda_stmt(lambda: select(
+            func.coalesce(func.max(model.sequence_number), 0) + 1
+        ).where(model.conversation_id == conversation_id))
+        result = await db.execute(query)
+        return result.scalar_one()
+    
+    async def append_many(
+        self, db: AsyncSession, *, conversation_id: str, objs_in: List[Dict[str, Any]]
+    ) -> List[Message]:
+        """Append messages to a conversation in one INSERT ... RETURNING and a single commit.
+        
+        Sequence numbers continue from the conversation's last message in the
+        order given. They are computed by a MAX + 1 subquery inside the INSERT,
+        so appending takes no separate round trip to look up the next number.
+        
+        Args:
+            db: Database session
+            conversation_id: Conversation to append to
+            objs_in: Message fields other than conversation_id and sequence_number
+            
+        Returns:
+            The created messages, in the order given
+        """
+        if not objs_in:
+            return []
+        model = self.model
+        next_sequence_number = select(
+            func.coalesce(func.max(model.sequence_number), 0) + 1
+        ).where(model.conversation_id == conversation_id).scalar_subquery()
+        query = insert(model).values(
+            sequence_number=next_sequence_number + bindparam("sequence_offset")
+        ).returning(model, sort_by_parameter_order=True)
+        result = await db.execute(query, [
+            {**obj_in, "conversation_id": conversation_id, "sequence_offset": i}
+            for i, obj_in in enumerate(objs_in)
+        ])
+        db_objs = list(result.scalars().all())
+        await db.commit()
+        return db_objs
         
     async def count_by_conversation(
         self, db: AsyncSession, *, conversation_id: str, message_type: Optional[str] = None
     ) -> int:
         """Count messages in a conversation, optionally filtering by type."""
-        query = select(func.count()).select_from(self.model).where(
-            self.model.conversation_id == conversation_id
-        )
+        model = self.model
+        query = lambda_stmt(lambda: select(func.count()).select_from(model).where(
+            model.conversation_id == conversation_id
+        ))
         
         if message_type:
-            query = query.where(self.model.message_type == message_type)
+            query += lambda s: s.where(model.message_type == message_type)
             
         result = await db.execute(query)
         return result.scalar_one() or 0 
\ No newline at end of file
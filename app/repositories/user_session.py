@@ -1,9 +1,11 @@
 from typing import List, Optional
-from sqlalchemy import select, update
+from sqlalchemy import select, update, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.user_session import UserSession
 from app.schemas.user_session import UserSessionCreate, UserSessionUpdate
+from app.models.types import is_valid_uuid
 from app.repositories.base import BaseRepository
 
 
@@ -13,24 +15,43 @@ class UserSessionRepository(BaseRepository[UserSession, UserSessionCreate, UserS
     def __init__(self):
         super().__init__(UserSession)
     
+    async def get_with_conversations(self, db: AsyncSession, *, id: str) -> Optional[UserSession]:
+        """Get a user session with its conversations loaded in one extra query."""
+        if not is_valid_uuid(id):
+            return None
+        model = self.model
+        query = lambda_stmt(lambda: select(model).options(
+            selectinload(model.conversations)
+        ).where(model.id == id))
+        result = await db.execute(query)
+        return result.scalars().first()
+    
     async def get_by_user_identifier(self, db: AsyncSession, *, user_identifier: str) -> Optional[UserSession]:
         """Get a user session by user identifier."""
-        query = select(self.model).where(self.model.user_identifier == user_identifier)
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(model.user_identifier == user_identifier))
         result = await db.execute(query)
         return result.scalars().first()
     
     async def get_active_sessions(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[UserSession]:
         """Get all active user sessions."""
-        query = select(self.model).where(self.model.is_active == True).offset(skip).limit(limit)
+        model = self.model
+        query = lambda_stmt(lambda: select(model).where(model.is_active == True).offset(skip).limit(limit))
         result = await db.execute(query)
         return result.scalars().all()
     
     async def deactivate_session(self, db: AsyncSession, *, id: str) -> Optional[UserSession]:
         """Deactivate a user session."""
-        session = await self.get(db=db, id=id)
-        if session:
-            session.is_active = False
-            db.add(session)
-            await db.commit()
-            await db.refresh(session)
+        if not is_valid_uuid(id):
+            return None
+        # A single UPDATE ... RETURNING instead of loading the row first
+        query = (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(is_active=False)
+            .returning(self.model)
+        )
+        result = await db.execute(query)
+        session = result.scalars().first()
+        await db.commit()
         return session 
\ No newline at end of file
@@ -1,11 +1,32 @@
-from app.schemas.user_session import UserSessionCreate, UserSessionUpdate, UserSessionInDB, UserSessionResponse
-from app.schemas.conversation import ConversationCreate, ConversationUpdate, ConversationInDB, ConversationResponse
-from app.schemas.message import MessageCreate, MessageUpdate, MessageInDB, MessageResponse
-from app.schemas.question_generation import QuestionRequest, QuestionResponse
-
-__all__ = [
-    "UserSessionCreate", "UserSessionUpdate", "UserSessionInDB", "UserSessionResponse",
-    "ConversationCreate", "ConversationUpdate", "ConversationInDB", "ConversationResponse",
-    "MessageCreate", "MessageUpdate", "MessageInDB", "MessageResponse",
-    "QuestionRequest", "QuestionResponse",
-] 
\ No newline at end of file
+from importlib import import_module
+
+# Schemas are imported lazily on first attribute access, so importing one
+# schema module does not build the pydantic schemas of all the others
+_EXPORTS = {
+    "UserSessionCreate": "app.schemas.user_session",
+    "UserSessionUpdate": "app.schemas.user_session",
+    "UserSessionInDB": "app.schemas.user_session",
+    "UserSessionResponse": "app.schemas.user_session",
+    "ConversationCreate": "app.schemas.conversation",
+    "ConversationUpdate": "app.schemas.conversation",
+    "ConversationInDB": "app.schemas.conversation",
+    "ConversationResponse": "app.schemas.conversation",
+    "MessageCreate": "app.schemas.message",
+    "MessageUpdate": "app.schemas.message",
+    "MessageInDB": "app.schemas.message",
+    "MessageResponse": "app.schemas.message",
+    "QuestionRequest": "app.schemas.question_generation",
+    "QuestionResponse": "app.schemas.question_generation",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
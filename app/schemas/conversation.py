@@ -1,7 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, ClassVar, Type
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
 from datetime import datetime
-from uuid import uuid4
 from app.schemas.message import MessageResponse
 
 
@@ -24,14 +23,13 @@ class ConversationUpdate(ConversationBase):
 
 class ConversationInDB(ConversationBase):
     """Schema for conversation data as stored in the database."""
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
     user_session_id: str
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class ConversationResponse(ConversationInDB):
     """Schema for conversation data returned in API responses."""
@@ -40,5 +38,4 @@ class ConversationResponse(ConversationInDB):
 
 class ConversationWithMessages(ConversationResponse):
     """Schema for conversation with related messages."""
-    messages: List[MessageResponse] = []
-    MessageResponse: ClassVar[Type] = MessageResponse 
\ No newline at end of file
+    messages: List[MessageResponse] = [] 
\ No newline at end of file
@@ -1,8 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, Dict, Any
 from datetime import datetime
-from uuid import uuid4
-import json
 
 
 class MessageBase(BaseModel):
@@ -17,11 +15,6 @@ class MessageCreate(MessageBase):
     """Schema for creating a new message."""
     conversation_id: str
 
-    class Config:
-        json_encoders = {
-            dict: lambda v: json.dumps(v)
-        }
-
 
 class MessageUpdate(BaseModel):
     """Schema for updating an existing message."""
@@ -29,33 +22,20 @@ class MessageUpdate(BaseModel):
     content: Optional[str] = None
     message_metadata: Optional[Dict[str, Any]] = None
 
-    class Config:
-        json_encoders = {
-            dict: lambda v: json.dumps(v)
-        }
-
 
 class MessageInDB(MessageBase):
     """Schema for message data as stored in the database."""
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
     conversation_id: str
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
     @property
     def metadata_dict(self) -> Dict[str, Any]:
-        """Parse the metadata JSON string into a dictionary."""
-        if not self.message_metadata:
-            return {}
-        if isinstance(self.message_metadata, dict):
-            return self.message_metadata
-        try:
-            return json.loads(self.message_metadata)
-        except (json.JSONDecodeError, TypeError):
-            return {}
+        """Get the metadata as a dictionary, empty if there is none."""
+        return self.message_metadata or {}
 
 
 class MessageResponse(MessageInDB):
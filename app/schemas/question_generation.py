@@ -1,7 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from uuid import uuid4
 
 
 class MessageItem(BaseModel):
@@ -17,8 +16,7 @@ class MessageItem(BaseModel):
     )
     timestamp: Optional[datetime] = Field(
         None,
-        description="Optional timestamp of when the message was sent",
-        json_schema_override={"type": ["string", "null"], "format": "date-time"}
+        description="Optional timestamp of when the message was sent"
     )
 
 
@@ -32,45 +30,50 @@ class QuestionItem(BaseModel):
         examples=[{
             "importance": "This question helps understand user goals",
             "information_to_look_for": "Specific details about timing and priorities"
-        }],
-        json_schema_override={"type": ["object", "null"]}
+        }]
     )
 
 
+# Most recent previous messages kept in a request; older ones are dropped
+MAX_PREVIOUS_MESSAGES = 64
+
+
 class QuestionRequest(BaseModel):
     """Schema for question generation request."""
     user_id: Optional[str] = Field(
         None,
-        description="Optional user identifier",
-        json_schema_override={"type": ["string", "null"]}
+        description="Optional user identifier"
     )
     conversation_id: Optional[str] = Field(
         None,
-        description="Conversation identifier for maintaining context continuity; if omitted a new conversation will be created",
-        json_schema_override={"type": ["string", "null"]}
+        description="Conversation identifier for maintaining context continuity; if omitted a new conversation will be created"
     )
     session_id: Optional[str] = Field(
         None,
-        description="Optional session identifier",
-        json_schema_override={"type": ["string", "null"]}
+        description="Optional session identifier"
     )
     context: Optional[str] = Field(
         None,
-        description="Optional context information for the question generation",
-        json_schema_override={"type": ["string", "null"]}
+        description="Optional context information for the question generation"
     )
     previous_messages: Optional[List[MessageItem]] = Field(
         None,
-        description="Optional list of previous messages in the conversation",
-        json_schema_override={"type": ["array", "null"]}
+        description=f"Optional list of previous messages in the conversation; only the last {MAX_PREVIOUS_MESSAGES} are used"
     )
     metadata: Optional[Dict[str, str]] = Field(
         None,
         description="Optional metadata for the request. Values should be strings.",
-        examples=[{"source": "chat_interface", "version": "1.0"}],
-        json_schema_override={"type": ["object", "null"]}
+        examples=[{"source": "chat_interface", "version": "1.0"}]
     )
     
+    @field_validator("previous_messages")
+    @classmethod
+    def keep_recent_messages(cls, messages: Optional[List[MessageItem]]) -> Optional[List[MessageItem]]:
+        """Keep only the most recent messages, bounding the prompt size."""
+        if messages and len(messages) > MAX_PREVIOUS_MESSAGES:
+            return messages[-MAX_PREVIOUS_MESSAGES:]
+        return messages
+    
 
 class QuestionResponse(BaseModel):
     """Schema for question generation response."""
@@ -82,15 +85,12 @@ class QuestionResponse(BaseModel):
     total_questions_in_batch: int = Field(..., description="Total questions generated in this batch")
     total_questions_estimated: int = Field(5, description="Estimated total questions for the entire conversation")
     next_batch_needed: bool = Field(True, description="Whether another batch of questions will be needed after this one")
-    metadata: Optional[Dict[str, str]] = Field(
+    metadata: Optional[Dict[str, Any]] = Field(
         None,
         description="Optional metadata for the response",
         examples=[{
             "question_type": "follow_up",
             "context_enhanced": "true",
             "timestamp": "2023-09-28T15:30:45.123456"
-        }],
-        json_schema_override={"type": ["object", "null"]}
+        }]
     )
-    
-    # Removed model_config overrides; using json_schema_override for optional field types 
\ No newline at end of file
@@ -1,7 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, ClassVar, Type
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
 from datetime import datetime
-from uuid import uuid4
 from app.schemas.conversation import ConversationResponse
 
 
@@ -26,13 +25,12 @@ class UserSessionUpdate(UserSessionBase):
 
 class UserSessionInDB(UserSessionBase):
     """Schema for user session data as stored in the database."""
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class UserSessionResponse(UserSessionInDB):
     """Schema for user session data returned in API responses."""
@@ -0,0 +1,106 @@
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Sequence, Set, Tuple, TypeVar
+import asyncio
+
+from app.core.logging import app_logger
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class AsyncBatcher(Generic[T, R]):
+    """Coalesce concurrent calls into batched calls of an async function.
+
+    Items already queued when a batch is collected (up to ``max_batch``
+    items) are handed to ``batch_fn`` in a single call. Once a second item
+    is seen, the batcher waits at most ``max_wait_ms`` for the batch to
+    fill; a lone item is dispatched immediately. ``batch_fn`` must
+    return one result per item, in order; a result that is an exception
+    instance is raised to the caller that submitted that item only.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], Awaitable[Sequence[Any]]],
+        max_batch: int = 8,
+        max_wait_ms: float = 10.0,
+    ):
+        """Initialize the batcher.
+
+        Args:
+            batch_fn: Async function processing a list of items
+            max_batch: Maximum number of items per batch
+            max_wait_ms: How long a partial batch may wait for more items
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional["asyncio.Queue[Tuple[T, asyncio.Future]]"] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    def _ensure_worker(self) -> None:
+        """Start the drain task on the running loop if it is not running yet."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item: T) -> R:
+        """Submit an item and wait for its result.
+
+        Args:
+            item: The item to process
+
+        Returns:
+            The result produced for this item by the batch function
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Drain the queue, grouping items that arrive close together."""
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                # Only hold back a batch that other callers are already joining
+                remaining = deadline - self._loop.time()
+                if len(batch) == 1 or remaining <= 0:
+                    break
+                await asyncio.sleep(remaining)
+            # Dispatch without blocking collection of the next batch; keep a
+            # reference so the task is not garbage collected mid-flight
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        """Run the batch function and resolve each caller's future."""
+        app_logger.debug(f"Dispatching batch of {len(batch)} items")
+        try:
+            results = await self.batch_fn([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            error = RuntimeError(f"Batch function returned {len(results)} results for {len(batch)} items")
+            results = [error] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
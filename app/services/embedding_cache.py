@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+class EmbeddingCache:
+    """In-memory LRU cache of text embeddings, keyed by a digest of the text.
+
+    Embeddings are deterministic for a given model and text, so entries never
+    go stale and are only evicted once ``max_size`` is reached. Hits, misses
+    and evictions are counted for the metrics endpoint.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            max_size: Maximum number of embeddings kept
+        """
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _make_key(text: str) -> bytes:
+        """Digest a text so long inputs are not kept alive as keys."""
+        return blake2b(text.encode(), digest_size=16).digest()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Get the cached embedding of a text.
+
+        Args:
+            text: The embedded text
+
+        Returns:
+            The embedding, or None on a miss
+        """
+        key = self._make_key(text)
+        embedding = self._entries.get(key)
+        if embedding is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return embedding
+
+    def set(self, text: str, embedding: np.ndarray) -> None:
+        """Store the embedding of a text, evicting the least recently used entry if full.
+
+        Args:
+            text: The embedded text
+            embedding: Its embedding vector
+        """
+        key = self._make_key(text)
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache size and its hit, miss and eviction counts."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+# Application-wide cache for query and message embeddings
+embedding_cache = EmbeddingCache(max_size=settings.EMBEDDING_CACHE_MAX_SIZE)
@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Search scope: the filter's (key, value) pairs and the result limit
+Scope = Tuple[Tuple[Tuple[str, Any], ...], int]
+
+
+class QueryVectorCache:
+    """In-memory cache of similarity search results, matched by query embedding.
+
+    A search is answered from the cache when an earlier search of the same
+    scope had a query embedding whose cosine similarity to the new one is at
+    least ``threshold``, so a rephrased follow-up does not repeat the vector
+    search. Slots are reused first in, first out once ``max_size`` is reached.
+
+    Embeddings are stored as int8 codes, each scaled so its largest component
+    maps to 127, which keeps a quarter of the memory of float32 while moving
+    cosine similarities by well under 0.001. A lookup is a single
+    matrix-vector product over the rows of the query's scope.
+
+    Cached results go stale when points are stored; ``invalidate`` drops the
+    entries of every scope a stored point could appear in.
+    """
+
+    def __init__(self, dimensions: int = 1536, max_size: int = 1024, threshold: float = 0.97):
+        """Initialize the cache.
+
+        Args:
+            dimensions: Length of the query embeddings
+            max_size: Maximum number of searches kept
+            threshold: Minimum cosine similarity for a cached search to be reused
+        """
+        self.max_size = max(1, max_size)
+        self.threshold = threshold
+        self._codes = np.zeros((self.max_size, dimensions), dtype=np.int8)
+        self._norms = np.ones(self.max_size, dtype=np.float32)
+        # Hash of each slot's scope; hash() never returns -1, which marks an empty slot
+        self._scope_hashes = np.full(self.max_size, -1, dtype=np.int64)
+        self._entries: List[Optional[Tuple[Scope, List[Dict[str, Any]]]]] = [None] * self.max_size
+        self._next_slot = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_scope(filter_params: Optional[Dict[str, Any]], limit: int) -> Scope:
+        """Build the scope of a search from its filter and limit."""
+        return tuple(sorted((filter_params or {}).items())), limit
+
+    def _quantize(self, embedding: np.ndarray) -> Optional[Tuple[np.ndarray, float]]:
+        """Quantize an embedding to int8 codes.
+
+        Returns:
+            The codes and their norm, or None for all-zero embeddings and
+            embeddings of another length, which are never cached
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != self._codes.shape[1:]:
+            return None
+        peak = np.abs(vector).max()
+        if not peak:
+            return None
+        codes = np.round(vector * (127 / peak)).astype(np.int8)
+        return codes, float(np.linalg.norm(codes.astype(np.float32)))
+
+    def get(self, embedding: np.ndarray, scope: Scope) -> Optional[List[Dict[str, Any]]]:
+        """Get the results of a cached search similar to a query.
+
+        Args:
+            embedding: Embedding of the query
+            scope: Scope of the search, from make_scope
+
+        Returns:
+            Copies of the cached results, or None on a miss
+        """
+        quantized = self._quantize(embedding)
+        # Only searches of the same scope are compared; with per-conversation
+        # filters that is a small fraction of the cache
+        slots = np.flatnonzero(self._scope_hashes == hash(scope))
+        if quantized is not None and slots.size:
+            codes, norm = quantized
+            similarities = (
+                (self._codes[slots].astype(np.float32) @ codes.astype(np.float32))
+                / (self._norms[slots] * norm)
+            )
+            best = int(np.argmax(similarities))
+            entry = self._entries[slots[best]]
+            if similarities[best] >= self.threshold and entry is not None and entry[0] == scope:
+                self.hits += 1
+                return [dict(result) for result in entry[1]]
+        self.misses += 1
+        return None
+
+    def set(self, embedding: np.ndarray, scope: Scope, results: List[Dict[str, Any]]) -> None:
+        """Store the results of a search, reusing the oldest slot if full.
+
+        Args:
+            embedding: Embedding of the query
+            scope: Scope of the search, from make_scope
+            results: The search results
+        """
+        quantized = self._quantize(embedding)
+        if quantized is None:
+            return
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.max_size
+        self._codes[slot], self._norms[slot] = quantized
+        self._scope_hashes[slot] = hash(scope)
+        self._entries[slot] = (scope, [dict(result) for result in results])
+
+    def invalidate(self, payload: Dict[str, Any]) -> None:
+        """Drop cached searches whose filter matches a newly stored point.
+
+        Args:
+            payload: Payload of the stored point
+        """
+        for slot, entry in enumerate(self._entries):
+            if entry is not None and all(payload.get(key) == value for key, value in entry[0][0]):
+                self._entries[slot] = None
+                self._scope_hashes[slot] = -1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the number of cached searches and the hit and miss counts."""
+        return {
+            "size": sum(entry is not None for entry in self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self._codes.fill(0)
+        self._norms.fill(1)
+        self._scope_hashes.fill(-1)
+        self._entries = [None] * self.max_size
+        self._next_slot = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Application-wide cache for similarity search results
+query_cache = QueryVectorCache(
+    max_size=settings.QUERY_CACHE_MAX_SIZE,
+    threshold=settings.QUERY_CACHE_SIMILARITY_THRESHOLD,
+)
@@ -1,20 +1,28 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Any, NamedTuple, Optional, Tuple, Union
+import asyncio
 from datetime import datetime
-import json
+from functools import cached_property
+from operator import itemgetter
 from uuid import uuid4
 import os
 import logging
+import re
+
+import orjson
 
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable, RunnableSequence
 from langchain.schema import AIMessage, HumanMessage, SystemMessage
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, ValidationError
 
 from app.core.config import get_settings
+from app.core.http import get_openai_http_client
 from app.core.logging import app_logger
 from app.core.monitoring import measure_time
 from app.services.vector_db import vector_db_service
@@ -23,7 +31,6 @@ from app.repositories.conversation import ConversationRepository
 from app.repositories.message import MessageRepository
 from app.schemas.user_session import UserSessionCreate
 from app.schemas.conversation import ConversationCreate
-from app.schemas.message import MessageCreate
 from app.schemas.question_generation import QuestionRequest, QuestionResponse, MessageItem, QuestionItem
 from app.models.message import Message, MessageType
 from app.services.vector_search import VectorSearchService
@@ -63,26 +70,158 @@ Output should be a single, focused question without any additional commentary or
 """
 
 
-class QuestionGenerationService:
-    """Service for generating sequential questions."""
+# Prompt asking for a batch of questions, together with the assessment of
+# whether more batches will be needed, as a single JSON object
+BATCH_QUESTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessagePromptTemplate.from_template(
+        """You are an expert question generator for a sequential questioning system.
+        Your goal is to generate a batch of {batch_size} thoughtful, relevant questions based on the provided context.
+        
+        These questions should:
+        1. Be clear, specific, and designed to gather useful information
+        2. Follow a logical progression, with each question building on previous ones
+        3. Cover different aspects of the topic to get a comprehensive understanding
+        4. Be diverse in nature (avoid repetition)
+        5. Be numbered sequentially
+        6. Be designed for the user to answer all questions in a single response
+        
+        For each question, also provide:
+        - An explanation of why this question is important to ask
+        - A suggestion for what kind of information to look for in the answer
+        
+        Based on the context and the conversation so far, also determine:
+        1. Whether more question batches would likely be needed after this one
+        2. Approximately how many total questions might be appropriate for this topic
+        
+        The user will see all questions at once in a numbered list format, and will be expected to answer all of them in a single response using the same numbering format.
+        """
+    ),
+    HumanMessagePromptTemplate.from_template(
+        "Context: {context}\n\n"
+        "Previous messages (if any):\n{previous_messages}\n\n"
+        "Generate {batch_size} sequential questions starting with question #{starting_question_number}. "
+        "Format your response as a JSON object with a 'questions' array of question objects, each with "
+        "'question_text', 'importance_explanation', and 'information_to_look_for' fields, "
+        "plus a 'next_batch_needed' boolean and a 'total_questions_estimated' integer."
+    )
+])
+
+
+# Contents of a Markdown code fence, with or without a json language tag
+_CODE_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+
+# Generic questions used when the LLM output cannot be used; questions past
+# the end of the table repeat the last one
+FALLBACK_QUESTION_TEMPLATES = (
+    "What are your main goals related to {topic}?",
+    "What challenges do you anticipate in achieving these goals?",
+    "What resources do you have available to help you with these goals?",
+    "How will you measure your progress toward these goals?",
+    "What else would you like to share about your {goals}?",
+)
+
+# Longest conversation topic derived from a request's context
+TOPIC_MAX_CHARS = 50
+
+
+def _topic_from_context(context: str, max_chars: int = TOPIC_MAX_CHARS) -> str:
+    """Shorten a context to a conversation topic, cutting at a word boundary."""
+    if len(context) <= max_chars:
+        return context
+    return context[:max_chars].rsplit(" ", 1)[0]
+
+
+class _GeneratedQuestion(BaseModel):
+    """A single question as returned by the LLM."""
+    question_text: str
+    importance_explanation: str
+    information_to_look_for: str
+
+
+class _GeneratedBatch(BaseModel):
+    """A question batch and its continuation assessment, as returned by the LLM."""
+    questions: List[_GeneratedQuestion]
+    next_batch_needed: bool
+    total_questions_estimated: int
+
+
+class _GenerationPlan(NamedTuple):
+    """Everything needed to generate and store a request's next question batch."""
+    session_id: str
+    conversation_id: str
+    context: str
+    previous_messages: str
+    has_previous_messages: bool
+    context_enhanced: bool
+    starting_question_number: int
+    batch_size: int
+    # Taken once per request and used for every timestamp in its metadata
+    timestamp: str
+
+
+class _StreamedObjectParser:
+    """Incrementally extract JSON objects that are elements of an array.
     
-    _instance = None
+    Text is fed in as it streams from the LLM; each object directly inside
+    a JSON array is returned as soon as its closing brace arrives, whether
+    the array is the top-level value or nested (e.g. {"questions": [...]}).
+    Text outside any brackets, such as a Markdown code fence, is ignored.
+    """
+    
+    def __init__(self):
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._object_depth: Optional[int] = None
+        self._buffer: List[str] = []
+    
+    def feed(self, text: str) -> List[Any]:
+        """Consume the next piece of text, returning the objects it completed."""
+        completed = []
+        for char in text:
+            if self._object_depth is not None:
+                self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"' and self._stack:
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._object_depth is None and self._stack and self._stack[-1] == "[":
+                    self._object_depth = len(self._stack)
+                    self._buffer = [char]
+                self._stack.append(char)
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if self._object_depth == len(self._stack):
+                    try:
+                        completed.append(orjson.loads("".join(self._buffer)))
+                    except ValueError:
+                        pass
+                    self._object_depth = None
+                    self._buffer = []
+        return completed
+
+
+class QuestionGenerationService:
+    """Service for generating sequential questions.
     
-    @classmethod
-    def get_instance(cls):
-        """Get singleton instance of the service."""
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+    The application shares the module-level question_generation_service
+    instance rather than constructing the service.
+    """
     
     def __init__(self):
         """Initialize the question generation service with LangChain components."""
-        # Ensure singleton pattern
-        if QuestionGenerationService._instance is not None:
-            raise RuntimeError("QuestionGenerationService is a singleton! Use get_instance() instead.")
-        
         # Initialize base components
-        self.llm = self._initialize_llm()
+        # Caps the LLM requests in flight, so load spikes queue here instead
+        # of running into the provider's rate limits and retrying
+        self.llm_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
         self.message_repository = MessageRepository()
         self.conversation_repository = ConversationRepository()
         self.user_session_repository = UserSessionRepository()
@@ -105,12 +244,40 @@ class QuestionGenerationService:
                 "Generate an initial question for this conversation:"
             )
         ])
+    
+    @cached_property
+    def llm(self) -> BaseChatModel:
+        """The chat model, initialized on first use.
         
-        # Create chains
-        self.follow_up_question_chain = self.follow_up_question_prompt | self.llm | StrOutputParser()
-        self.initial_question_chain = self.initial_question_prompt | self.llm | StrOutputParser()
+        The model and the runnables built on it are created lazily, so
+        importing the service does not construct an API client or require
+        the OpenAI settings.
+        """
+        return self._initialize_llm()
+    
+    @cached_property
+    def structured_llm(self) -> Runnable:
+        """The chat model returning question batches as validated structured output.
         
-        QuestionGenerationService._instance = self
+        Function calling works on every tool-capable model, unlike strict
+        JSON schemas.
+        """
+        return self.llm.with_structured_output(_GeneratedBatch, method="function_calling")
+    
+    @cached_property
+    def json_llm(self) -> Runnable:
+        """The chat model in JSON mode, for streamed batches parsed as they arrive."""
+        return self.llm.bind(response_format={"type": "json_object"})
+    
+    @cached_property
+    def follow_up_question_chain(self) -> Runnable:
+        """Chain generating a single follow-up question."""
+        return self.follow_up_question_prompt | self.llm | StrOutputParser()
+    
+    @cached_property
+    def initial_question_chain(self) -> Runnable:
+        """Chain generating a single initial question."""
+        return self.initial_question_prompt | self.llm | StrOutputParser()
     
     def _initialize_llm(self) -> BaseChatModel:
         """Initialize the LLM with appropriate configuration."""
@@ -126,12 +293,34 @@ class QuestionGenerationService:
             app_logger.error("OPENAI_API_KEY environment variable is not set or empty")
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
+        # One connection pool for all OpenAI calls, so requests reuse kept-alive connections
+        self.http_client = get_openai_http_client()
+        
         return ChatOpenAI(
             model_name=model_name,
             temperature=temperature,
-            openai_api_key=api_key
+            openai_api_key=api_key,
+            http_async_client=self.http_client
         )
     
+    async def warmup(self) -> None:
+        """Open a connection to the LLM API ahead of the first request.
+        
+        Lists the available models, which costs no tokens, so the TLS
+        handshake is already done and the connection is kept alive in the
+        pool when the first question is generated. Failures are logged only.
+        """
+        try:
+            await self.llm.root_async_client.models.list(timeout=5.0)
+            app_logger.info("LLM API connection warmed up")
+        except Exception as e:
+            app_logger.warning(f"LLM API warmup failed: {str(e)}")
+    
+    async def _invoke_structured_llm(self, prompt: List[Any]) -> Any:
+        """Invoke the structured LLM on one prompt within the concurrency limit."""
+        async with self.llm_semaphore:
+            return await self.structured_llm.ainvoke(prompt)
+    
     @measure_time
     async def generate_question(
         self, 
@@ -147,6 +336,127 @@ class QuestionGenerationService:
         Returns:
             Generated question response with metadata and a batch of questions
         """
+        plan = await self._prepare_generation(db, request)
+        
+        # Generate batch of questions; an initial batch uses the context only
+        questions_batch, batch_metadata = await self._generate_question_batch(
+            plan.context, 
+            plan.previous_messages, 
+            batch_size=plan.batch_size,
+            starting_question_number=plan.starting_question_number,
+            timestamp=plan.timestamp
+        )
+        
+        # Order the batch once here, so questions are stored and returned by number
+        questions_batch.sort(key=itemgetter("question_number"))
+        
+        await self._store_question_batch(db, plan, questions_batch)
+        return self._build_question_response(plan, questions_batch, batch_metadata)
+    
+    async def generate_question_stream(
+        self, 
+        db, 
+        request: QuestionRequest
+    ) -> AsyncIterator[Union[QuestionItem, QuestionResponse]]:
+        """Generate a batch of sequential questions, yielding each as soon as it is parsed.
+        
+        The batch is requested from the LLM as a stream in JSON mode, and every
+        question object is yielded the moment its closing brace arrives, so the
+        caller sees the first question without waiting for the whole batch. Once
+        the stream ends, the batch metadata is read from the same response, the
+        batch is stored and the complete response is yielded last, exactly as
+        generate_question would return it.
+        
+        Args:
+            db: Database session
+            request: Question request containing context and previous messages
+            
+        Yields:
+            One QuestionItem per generated question, then the QuestionResponse
+        """
+        plan = await self._prepare_generation(db, request)
+        
+        questions_batch = []
+        # The LLM stream is read by its own task, so the caller consuming the
+        # questions at its own pace never holds a concurrency slot
+        streamed_questions: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        stream_task = asyncio.create_task(self._stream_question_batch(plan, streamed_questions))
+        try:
+            while (question := await streamed_questions.get()) is not None:
+                questions_batch.append(question)
+                yield self._to_question_item(question)
+            content = await stream_task
+        except Exception as e:
+            # Questions already yielded stand; the rest of the batch is filled in below
+            app_logger.error(f"Error streaming batch questions: {str(e)}")
+            content = []
+        finally:
+            stream_task.cancel()
+        
+        # Complete the batch with generic questions, yielded like the streamed ones
+        streamed = len(questions_batch)
+        if streamed:
+            self._pad_question_batch(questions_batch, plan.context, plan.batch_size, plan.starting_question_number)
+        else:
+            questions_batch = self._fallback_questions(plan.context, plan.batch_size, plan.starting_question_number)
+        for question in questions_batch[streamed:]:
+            yield self._to_question_item(question)
+        
+        batch_metadata = self._default_batch_metadata(questions_batch, plan.starting_question_number, plan.timestamp)
+        if not streamed:
+            batch_metadata["fallback_generation"] = True
+        self._apply_batch_metadata(batch_metadata, self._parse_assessment(content), plan.starting_question_number)
+        
+        await self._store_question_batch(db, plan, questions_batch)
+        yield self._build_question_response(plan, questions_batch, batch_metadata)
+    
+    async def _stream_question_batch(
+        self,
+        plan: "_GenerationPlan",
+        questions: "asyncio.Queue[Optional[Dict[str, Any]]]"
+    ) -> List[str]:
+        """Stream a question batch from the LLM, queueing each question as soon as it is parsed.
+        
+        The concurrency slot is held only while the response streams in. None
+        is queued once the stream ends, whether or not it succeeded.
+        
+        Args:
+            plan: The plan for the batch being generated
+            questions: Queue receiving the normalized questions
+            
+        Returns:
+            The content chunks of the LLM response
+        """
+        content: List[str] = []
+        parser = _StreamedObjectParser()
+        queued = 0
+        try:
+            async with self.llm_semaphore:
+                async for chunk in self.json_llm.astream(self._batch_messages(
+                    plan.context, plan.previous_messages, plan.batch_size, plan.starting_question_number
+                )):
+                    content.append(chunk.content)
+                    for question in parser.feed(chunk.content):
+                        if not isinstance(question, dict) or queued >= plan.batch_size:
+                            continue
+                        questions.put_nowait(
+                            self._normalize_question(question, plan.starting_question_number + queued)
+                        )
+                        queued += 1
+        finally:
+            questions.put_nowait(None)
+        return content
+    
+    async def _prepare_generation(self, db, request: QuestionRequest) -> "_GenerationPlan":
+        """Resolve the session and conversation of a request and gather its prompt inputs.
+        
+        Args:
+            db: Database session
+            request: Question request containing context and previous messages
+            
+        Returns:
+            The plan for generating the request's next question batch
+        """
         # Log the incoming request parameters
         app_logger.info(f"Processing question generation request with conversation_id: {request.conversation_id}, user_id: {request.user_id}")
         
@@ -165,127 +475,151 @@ class QuestionGenerationService:
         else:
             app_logger.info(f"Created or found different conversation with ID: {conversation_id}, replacing requested ID: {request.conversation_id}")
         
-        # Process previous messages and context
-        previous_messages_formatted, has_previous_messages = self._format_previous_messages(
+        # Process previous messages and context in a single pass
+        previous_messages_formatted, has_previous_messages, last_user_message = self._preprocess_messages(
             request.previous_messages
         )
         
         # Get relevant context from vector database if available
         context = request.context or ""
-        if has_previous_messages and context:
-            # Enhance context with vector search
-            last_user_message = self._get_last_user_message(request.previous_messages)
-            if last_user_message:
-                similar_contexts = await vector_db_service.search_similar(
-                    last_user_message.content,
-                    filter_params={"conversation_id": conversation_id},
-                    limit=3
-                )
-                
-                if similar_contexts:
-                    enhanced_contexts = [
-                        f"- {ctx['payload'].get('content', '')}" 
-                        for ctx in similar_contexts 
-                        if 'content' in ctx['payload']
-                    ]
-                    if enhanced_contexts:
-                        context += "\n\nAdditional relevant information:\n" + "\n".join(enhanced_contexts)
-        
-        # Determine the starting question number
-        question_count = await self.message_repository.count_by_conversation(
-            db, conversation_id=conversation_id, message_type="question"
-        )
-        starting_question_number = question_count + 1
-        
-        # Define batch size (3-5 questions per batch)
-        batch_size = 5 if not has_previous_messages else 3
-        
-        # Generate batch of questions
-        if not has_previous_messages:
-            # For initial batch, use the context only
-            questions_batch, batch_metadata = await self._generate_question_batch(
-                context, 
-                "", 
-                batch_size=batch_size,
-                starting_question_number=starting_question_number
-            )
-        else:
-            # For follow-up batches, use both context and previous messages
-            questions_batch, batch_metadata = await self._generate_question_batch(
-                context, 
-                previous_messages_formatted, 
-                batch_size=batch_size,
-                starting_question_number=starting_question_number
+        if not context:
+            last_user_message = None
+        
+        # The vector search and the question count are independent, so run them concurrently
+        similar_contexts, question_count = await asyncio.gather(
+            self._search_similar_contexts(last_user_message, conversation_id),
+            self.message_repository.count_by_conversation(
+                db, conversation_id=conversation_id, message_type="question"
             )
+        )
         
-        # Create question items for the response
-        question_items = []
-        for q in questions_batch:
-            # Store each question in the database
-            message_data = MessageCreate(
-                conversation_id=conversation_id,
-                message_type="question",
-                content=q["question_text"],
-                metadata={
+        if similar_contexts:
+            # Enhance context with vector search
+            enhanced_contexts = [
+                f"- {ctx['payload'].get('content', '')}" 
+                for ctx in similar_contexts 
+                if 'content' in ctx['payload']
+            ]
+            if enhanced_contexts:
+                context += "\n\nAdditional relevant information:\n" + "\n".join(enhanced_contexts)
+        
+        return _GenerationPlan(
+            session_id=session_id,
+            conversation_id=conversation_id,
+            context=context,
+            previous_messages=previous_messages_formatted,
+            has_previous_messages=has_previous_messages,
+            context_enhanced=bool(similar_contexts),
+            starting_question_number=question_count + 1,
+            # Define batch size (3-5 questions per batch)
+            batch_size=5 if not has_previous_messages else 3,
+            timestamp=datetime.now().isoformat()
+        )
+    
+    async def _store_question_batch(
+        self, 
+        db, 
+        plan: "_GenerationPlan", 
+        questions_batch: List[Dict[str, Any]]
+    ) -> None:
+        """Store a generated batch as messages and as vectors for future context."""
+        # Store the whole batch in one statement, numbered after the conversation's last message
+        await self.message_repository.append_many(db, conversation_id=plan.conversation_id, objs_in=[
+            {
+                "message_type": "question",
+                "content": q["question_text"],
+                "message_metadata": {
                     "generated": True,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": plan.timestamp,
                     "question_number": q["question_number"],
-                    "batch_number": 1 + (q["question_number"] - 1) // batch_size,
+                    "batch_number": 1 + (q["question_number"] - 1) // plan.batch_size,
                     "importance_explanation": q.get("importance_explanation", ""),
                     "information_to_look_for": q.get("information_to_look_for", "")
-                },
-                sequence_number=await self.message_repository.get_next_sequence_number(db, conversation_id=conversation_id)
-            )
-            
-            question_msg = await self.message_repository.create(db, obj_in=message_data)
-        
-        # Store question text in vector database for future context
-        await vector_db_service.store_embedding(
-            text=q["question_text"],
-            metadata={
-                "content": q["question_text"],
-                "type": "question",
-                "question_number": q["question_number"],
-                "conversation_id": conversation_id,
-                "session_id": session_id,
-                "timestamp": datetime.now().isoformat()
+                }
             }
-        )
+            for q in questions_batch
+        ])
         
-        question_items.append(
-            QuestionItem(
-                question_text=q["question_text"],
-                question_number=q["question_number"],
-                metadata={
-                    "importance": q.get("importance_explanation", ""),
-                    "information_to_look_for": q.get("information_to_look_for", "")
+        # Store question texts in vector database for future context, in one
+        # embedding call and one upsert for the whole batch
+        await vector_db_service.store_embeddings(
+            texts=[q["question_text"] for q in questions_batch],
+            metadatas=[
+                {
+                    "content": q["question_text"],
+                    "type": "question",
+                    "question_number": q["question_number"],
+                    "conversation_id": plan.conversation_id,
+                    "session_id": plan.session_id,
+                    "timestamp": plan.timestamp
                 }
-            )
+                for q in questions_batch
+            ]
         )
+    
+    def _to_question_item(self, question: Dict[str, Any]) -> QuestionItem:
+        """Convert a generated question dict into a response item."""
+        return QuestionItem(
+            question_text=question["question_text"],
+            question_number=question["question_number"],
+            metadata={
+                "importance": question.get("importance_explanation", ""),
+                "information_to_look_for": question.get("information_to_look_for", "")
+            }
+        )
+    
+    def _build_question_response(
+        self, 
+        plan: "_GenerationPlan", 
+        questions_batch: List[Dict[str, Any]], 
+        batch_metadata: Dict[str, Any]
+    ) -> QuestionResponse:
+        """Build the response for a stored question batch."""
+        # Create question items for the response
+        question_items = [self._to_question_item(q) for q in questions_batch]
         
-        # Get the current question (first question in the batch)
-        current_question = questions_batch[0]["question_text"]
-        
-        app_logger.info(f"Generated question batch for conversation {conversation_id}: {len(question_items)} questions")
+        app_logger.info(f"Generated question batch for conversation {plan.conversation_id}: {len(question_items)} questions")
         
-        # Return the response with the batch of questions
+        # Return the response with the batch of questions; the current question is the first one
         return QuestionResponse(
-            current_question=current_question,
+            current_question=questions_batch[0]["question_text"],
             questions=question_items,
-            conversation_id=conversation_id,
-            session_id=session_id,
-            current_question_number=starting_question_number,
+            conversation_id=plan.conversation_id,
+            session_id=plan.session_id,
+            current_question_number=plan.starting_question_number,
             total_questions_in_batch=len(question_items),
             total_questions_estimated=batch_metadata.get("total_questions_estimated", 8),
             next_batch_needed=batch_metadata.get("next_batch_needed", True),
             metadata={
-                "context_enhanced": bool(similar_contexts) if has_previous_messages and context else False,
-                "question_type": "initial" if not has_previous_messages else "follow_up",
-                "timestamp": datetime.now().isoformat(),
+                "context_enhanced": plan.context_enhanced,
+                "question_type": "initial" if not plan.has_previous_messages else "follow_up",
+                "timestamp": plan.timestamp,
                 "batch_metadata": batch_metadata
             }
         )
     
+    async def _search_similar_contexts(
+        self,
+        message: Optional[MessageItem],
+        conversation_id: str
+    ) -> List[Dict[str, Any]]:
+        """Search the vector database for context similar to a message.
+        
+        Args:
+            message: The message to search with, if any
+            conversation_id: Conversation to restrict the search to
+            
+        Returns:
+            List of similar contexts, empty if there is no message to search with
+        """
+        if not message:
+            return []
+        return await vector_db_service.search_similar(
+            message.content,
+            filter_params={"conversation_id": conversation_id},
+            limit=3
+        )
+    
     async def _get_or_create_session(
         self, 
         db, 
@@ -339,7 +673,7 @@ class QuestionGenerationService:
         # If still no conversation, create a new one
         if not conversation:
             # Create new conversation
-            topic = context[:50] if context else "New conversation"
+            topic = _topic_from_context(context) if context else "New conversation"
             app_logger.info(f"Creating new conversation with topic: {topic}")
             conversation_data = ConversationCreate(
                 user_session_id=session_id,
@@ -351,35 +685,35 @@ class QuestionGenerationService:
         
         return conversation.id, conversation
     
-    def _format_previous_messages(self, messages: Optional[List[MessageItem]]) -> Tuple[str, bool]:
-        """Format previous messages for prompt."""
+    def _preprocess_messages(
+        self, 
+        messages: Optional[List[MessageItem]]
+    ) -> Tuple[str, bool, Optional[MessageItem]]:
+        """Format previous messages for the prompt and find the last user message.
+        
+        Returns:
+            Tuple of (formatted messages, whether there are any, last user message)
+        """
         if not messages:
-            return "", False
+            return "", False, None
         
         formatted_messages = []
+        last_user_message = None
         for msg in messages:
             role = msg.role.capitalize()
             formatted_messages.append(f"{role}: {msg.content}")
+            if role == "User":
+                last_user_message = msg
         
-        return "\n".join(formatted_messages), True
-    
-    def _get_last_user_message(self, messages: Optional[List[MessageItem]]) -> Optional[MessageItem]:
-        """Get the last user message from the conversation."""
-        if not messages:
-            return None
-        
-        for msg in reversed(messages):
-            if msg.role.lower() == "user":
-                return msg
-        
-        return None
+        return "\n".join(formatted_messages), True, last_user_message
     
     async def _generate_initial_question(self, context: str) -> str:
         """Generate an initial question based on context."""
         if not context:
             context = "General conversation"
             
-        response = await self.initial_question_chain.ainvoke({"context": context})
+        async with self.llm_semaphore:
+            response = await self.initial_question_chain.ainvoke({"context": context})
         return response.strip()
     
     async def _generate_follow_up_question(self, context: str, previous_messages: str) -> str:
@@ -387,215 +721,198 @@ class QuestionGenerationService:
         if not context:
             context = "Continue the conversation naturally"
             
-        response = await self.follow_up_question_chain.ainvoke({
-            "context": context,
-            "previous_messages": previous_messages
-        })
+        async with self.llm_semaphore:
+            response = await self.follow_up_question_chain.ainvoke({
+                "context": context,
+                "previous_messages": previous_messages
+            })
         return response.strip()
 
-    # Add this new method to generate multiple questions
+    def _batch_messages(
+        self, 
+        context: str, 
+        previous_messages: str, 
+        batch_size: int, 
+        starting_question_number: int
+    ) -> List[Any]:
+        """Format the prompt asking for a batch of questions."""
+        return BATCH_QUESTION_PROMPT.format_messages(
+            context=context,
+            previous_messages=previous_messages if previous_messages else "No previous messages",
+            batch_size=batch_size,
+            starting_question_number=starting_question_number
+        )
+    
+    @staticmethod
+    def _extract_json(content: str) -> str:
+        """Strip a Markdown code fence around JSON in an LLM response."""
+        # Find the JSON part if it's mixed with other text
+        match = _CODE_FENCE.search(content)
+        return match.group(1) if match else content
+    
+    def _normalize_question(self, question: Dict[str, Any], question_number: int) -> Dict[str, Any]:
+        """Ensure a parsed question has its text and number."""
+        if "question_text" not in question:
+            # Try to find a key that might contain the question text
+            for key in question.keys():
+                if "question" in key.lower():
+                    question["question_text"] = question[key]
+                    break
+            # If still not found, use a default
+            if "question_text" not in question:
+                question["question_text"] = f"Question #{question_number}"
+        
+        # Add question number if not present
+        if "question_number" not in question:
+            question["question_number"] = question_number
+        return question
+    
+    def _pad_question_batch(
+        self, 
+        questions_batch: List[Dict[str, Any]], 
+        context: str, 
+        batch_size: int, 
+        starting_question_number: int
+    ) -> None:
+        """Fill a batch with simple questions if the LLM returned fewer than requested."""
+        while len(questions_batch) < batch_size:
+            questions_batch.append({
+                "question_text": f"Can you provide more details about your {context.split()[0] if context else 'goals'}?",
+                "question_number": starting_question_number + len(questions_batch),
+                "importance_explanation": "This will help gather more specific information.",
+                "information_to_look_for": "Additional context and clarification."
+            })
+    
+    def _fallback_questions(
+        self, 
+        context: str, 
+        batch_size: int, 
+        starting_question_number: int
+    ) -> List[Dict[str, Any]]:
+        """Build generic questions for when the LLM output cannot be used."""
+        words = context.split(maxsplit=1) if context else []
+        topic = words[0] if words else "this topic"
+        goals = words[0] if words else "goals"
+        last = len(FALLBACK_QUESTION_TEMPLATES) - 1
+        return [
+            {
+                "question_text": FALLBACK_QUESTION_TEMPLATES[min(i, last)].format(topic=topic, goals=goals),
+                "question_number": starting_question_number + i,
+                "importance_explanation": "This is an essential question to understand your situation.",
+                "information_to_look_for": "Specific details and context."
+            }
+            for i in range(batch_size)
+        ]
+    
+    def _default_batch_metadata(
+        self, 
+        questions_batch: List[Dict[str, Any]], 
+        starting_question_number: int,
+        generated_at: str
+    ) -> Dict[str, Any]:
+        """Build the metadata of a batch before the LLM's assessment is applied."""
+        return {
+            "batch_size": len(questions_batch),
+            "starting_question_number": starting_question_number,
+            "ending_question_number": starting_question_number + len(questions_batch) - 1,
+            "generated_at": generated_at,
+            "next_batch_needed": True  # Default assumption
+        }
+    
+    def _parse_assessment(self, content: List[str]) -> Optional[Dict[str, Any]]:
+        """Parse the JSON object of a streamed batch response, or None if it is unusable."""
+        if not content:
+            return None
+        try:
+            assessment = orjson.loads(self._extract_json("".join(content)))
+        except ValueError as e:
+            app_logger.warning(f"Error parsing metadata JSON: {str(e)}")
+            return None
+        return assessment if isinstance(assessment, dict) else None
+    
+    def _apply_batch_metadata(
+        self, 
+        batch_metadata: Dict[str, Any], 
+        assessment: Optional[Dict[str, Any]], 
+        starting_question_number: int
+    ) -> None:
+        """Update batch metadata with the LLM's assessment, or defaults if there is none."""
+        if assessment is None:
+            # Use default values if the assessment is unavailable
+            batch_size = batch_metadata["batch_size"]
+            batch_metadata["next_batch_needed"] = starting_question_number + batch_size < 8
+            batch_metadata["total_questions_estimated"] = max(starting_question_number + batch_size + 2, 8)
+            return
+        
+        # Update batch metadata with LLM's assessment
+        if "next_batch_needed" in assessment:
+            batch_metadata["next_batch_needed"] = assessment["next_batch_needed"]
+        if "total_questions_estimated" in assessment:
+            batch_metadata["total_questions_estimated"] = assessment["total_questions_estimated"]
+    
     async def _generate_question_batch(
         self, 
         context: str, 
         previous_messages: str = "",
         batch_size: int = 5,
-        starting_question_number: int = 1
+        starting_question_number: int = 1,
+        timestamp: Optional[str] = None
     ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """Generate a batch of follow-up questions with metadata.
         
+        The questions and the assessment of whether more batches are needed
+        come back from a single structured-output call, validated against
+        _GeneratedBatch.
+        
         Args:
             context: Context information for question generation
             previous_messages: Formatted previous messages as context
             batch_size: Number of questions to generate in this batch
             starting_question_number: Starting question number for this batch
+            timestamp: Request timestamp recorded as the batch's generation time,
+                defaulting to the current time
             
         Returns:
             Tuple of (list of question dicts, batch metadata)
         """
-        # Create a prompt that asks for multiple questions
-        batch_prompt = ChatPromptTemplate.from_messages([
-            SystemMessagePromptTemplate.from_template(
-                """You are an expert question generator for a sequential questioning system.
-                Your goal is to generate a batch of {batch_size} thoughtful, relevant questions based on the provided context.
-                
-                These questions should:
-                1. Be clear, specific, and designed to gather useful information
-                2. Follow a logical progression, with each question building on previous ones
-                3. Cover different aspects of the topic to get a comprehensive understanding
-                4. Be diverse in nature (avoid repetition)
-                5. Be numbered sequentially
-                6. Be designed for the user to answer all questions in a single response
-                
-                For each question, also provide:
-                - An explanation of why this question is important to ask
-                - A suggestion for what kind of information to look for in the answer
-                
-                The user will see all questions at once in a numbered list format, and will be expected to answer all of them in a single response using the same numbering format.
-                """
-            ),
-            HumanMessagePromptTemplate.from_template(
-                "Context: {context}\n\n"
-                "Previous messages (if any):\n{previous_messages}\n\n"
-                "Generate {batch_size} sequential questions starting with question #{starting_question_number}. "
-                "Format your response as a JSON array of question objects, each with 'question_text', 'importance_explanation', "
-                "and 'information_to_look_for' fields."
-            )
-        ])
-        
-        # Call LLM with the batch prompt
-        response = await self.llm.ainvoke(
-            batch_prompt.format_messages(
-                context=context,
-                previous_messages=previous_messages if previous_messages else "No previous messages",
-                batch_size=batch_size,
-                starting_question_number=starting_question_number
-            )
-        )
-        
-        # Extract the content and parse JSON
+        generated_at = timestamp or datetime.now().isoformat()
         try:
-            content = response.content
-            # Find the JSON part if it's mixed with other text
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            questions_batch = json.loads(content)
-            
-            # If not in expected format, try to extract and reformat
-            if not isinstance(questions_batch, list):
-                if "questions" in questions_batch:
-                    questions_batch = questions_batch["questions"]
-                else:
-                    # Create a list from the parsed object
-                    questions_batch = [questions_batch]
-            
-            # Ensure each question has the required fields
-            for i, q in enumerate(questions_batch):
-                if "question_text" not in q:
-                    # Try to find a key that might contain the question text
-                    for key in q.keys():
-                        if "question" in key.lower():
-                            q["question_text"] = q[key]
-                            break
-                    # If still not found, use a default
-                    if "question_text" not in q:
-                        q["question_text"] = f"Question #{starting_question_number + i}"
-                
-                # Add question number if not present
-                if "question_number" not in q:
-                    q["question_number"] = starting_question_number + i
-            
-            # Limit to the requested batch size if we got more
-            questions_batch = questions_batch[:batch_size]
-            
-            # If we got fewer questions than requested, generate simple ones to fill the gap
-            while len(questions_batch) < batch_size:
-                questions_batch.append({
-                    "question_text": f"Can you provide more details about your {context.split()[0] if context else 'goals'}?",
-                    "question_number": starting_question_number + len(questions_batch),
-                    "importance_explanation": "This will help gather more specific information.",
-                    "information_to_look_for": "Additional context and clarification."
-                })
-            
-            # Generate batch metadata
-            batch_metadata = {
-                "batch_size": len(questions_batch),
-                "starting_question_number": starting_question_number,
-                "ending_question_number": starting_question_number + len(questions_batch) - 1,
-                "generated_at": datetime.now().isoformat(),
-                "next_batch_needed": True  # Default assumption
-            }
-            
-            # Let's ask if more questions might be needed after this batch
-            metadata_prompt = ChatPromptTemplate.from_messages([
-                SystemMessagePromptTemplate.from_template(
-                    """Based on the context and questions generated so far, determine:
-                    1. Whether more question batches would likely be needed after this one
-                    2. Approximately how many total questions might be appropriate for this topic
-                    
-                    Return your answer as JSON with these fields:
-                    - next_batch_needed: boolean
-                    - total_questions_estimated: integer
-                    """
-                ),
-                HumanMessagePromptTemplate.from_template(
-                    "Context: {context}\n\n"
-                    "Previous messages:\n{previous_messages}\n\n"
-                    "Current batch of questions (questions {starting_number} to {ending_number}):\n{generated_questions}\n\n"
-                    "Provide metadata about whether more questions would be needed:"
-                )
-            ])
-            
-            metadata_response = await self.llm.ainvoke(
-                metadata_prompt.format_messages(
-                    context=context,
-                    previous_messages=previous_messages if previous_messages else "No previous messages",
-                    starting_number=starting_question_number,
-                    ending_number=starting_question_number + len(questions_batch) - 1,
-                    generated_questions="\n".join([f"{q['question_number']}. {q['question_text']}" for q in questions_batch])
-                )
+            batch = await self._invoke_structured_llm(
+                self._batch_messages(context, previous_messages, batch_size, starting_question_number)
             )
-            
-            try:
-                content = metadata_response.content
-                # Find the JSON part if it's mixed with other text
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                
-                metadata_json = json.loads(content)
-                
-                # Update batch metadata with LLM's assessment
-                if "next_batch_needed" in metadata_json:
-                    batch_metadata["next_batch_needed"] = metadata_json["next_batch_needed"]
-                if "total_questions_estimated" in metadata_json:
-                    batch_metadata["total_questions_estimated"] = metadata_json["total_questions_estimated"]
-            except Exception as e:
-                app_logger.warning(f"Error parsing metadata JSON: {str(e)}")
-                # Use default values if parsing fails
-                batch_metadata["next_batch_needed"] = starting_question_number + len(questions_batch) < 8
-                batch_metadata["total_questions_estimated"] = max(starting_question_number + len(questions_batch) + 2, 8)
-            
-            return questions_batch, batch_metadata
-            
-        except Exception as e:
+        except (OutputParserException, ValidationError, ValueError) as e:
+            # Tool arguments that don't match _GeneratedBatch fail validation
             app_logger.error(f"Error processing batch questions: {str(e)}")
+            batch = None
+        else:
+            if batch is None:
+                # The model answered without calling the tool
+                app_logger.error("Error processing batch questions: no structured output returned")
+        
+        if batch is None:
             # Fallback to simpler question generation
-            fallback_questions = []
-            for i in range(batch_size):
-                q_num = starting_question_number + i
-                if i == 0:
-                    question = f"What are your main goals related to {context.split()[0] if context else 'this topic'}?"
-                elif i == 1:
-                    question = f"What challenges do you anticipate in achieving these goals?"
-                elif i == 2:
-                    question = f"What resources do you have available to help you with these goals?"
-                elif i == 3:
-                    question = f"How will you measure your progress toward these goals?"
-                else:
-                    question = f"What else would you like to share about your {context.split()[0] if context else 'goals'}?"
-                
-                fallback_questions.append({
-                    "question_text": question,
-                    "question_number": q_num,
-                    "importance_explanation": "This is an essential question to understand your situation.",
-                    "information_to_look_for": "Specific details and context."
-                })
-            
-            fallback_metadata = {
-                "batch_size": len(fallback_questions),
-                "starting_question_number": starting_question_number,
-                "ending_question_number": starting_question_number + len(fallback_questions) - 1,
-                "generated_at": datetime.now().isoformat(),
-                "next_batch_needed": starting_question_number + len(fallback_questions) < 8,
-                "total_questions_estimated": max(starting_question_number + len(fallback_questions) + 2, 8),
-                "fallback_generation": True
-            }
-            
+            fallback_questions = self._fallback_questions(context, batch_size, starting_question_number)
+            fallback_metadata = self._default_batch_metadata(fallback_questions, starting_question_number, generated_at)
+            self._apply_batch_metadata(fallback_metadata, None, starting_question_number)
+            fallback_metadata["fallback_generation"] = True
             return fallback_questions, fallback_metadata
+        
+        # Limit to the requested batch size if we got more
+        questions_batch = [
+            {**question.model_dump(), "question_number": starting_question_number + i}
+            for i, question in enumerate(batch.questions[:batch_size])
+        ]
+        
+        # If we got fewer questions than requested, generate simple ones to fill the gap
+        self._pad_question_batch(questions_batch, context, batch_size, starting_question_number)
+        
+        batch_metadata = self._default_batch_metadata(questions_batch, starting_question_number, generated_at)
+        self._apply_batch_metadata(
+            batch_metadata,
+            batch.model_dump(include={"next_batch_needed", "total_questions_estimated"}),
+            starting_question_number
+        )
+        return questions_batch, batch_metadata
 
 
 # Create question generation service instance
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, Optional, Tuple
+import time
+
+import orjson
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Request metadata key that forces regeneration instead of serving a cached response
+REDO_METADATA_KEY = "redo"
+
+
+class ResponseCache:
+    """In-memory TTL cache for generated responses, keyed by request content.
+
+    Entries are stored as serialized JSON so that every hit hands out a fresh
+    object. The least recently used entry is evicted once ``max_size`` is
+    reached.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_size: int = 1024):
+        """Initialize the cache.
+
+        Args:
+            ttl_seconds: How long an entry is served after it was stored
+            max_size: Maximum number of entries kept
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max(1, max_size)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(endpoint: str, request: BaseModel) -> str:
+        """Build a content-addressed key for a request to an endpoint.
+
+        Args:
+            endpoint: Name of the endpoint handling the request
+            request: The request model
+
+        Returns:
+            Hex digest identifying the endpoint and request content
+        """
+        payload = request.model_dump(mode="json")
+        metadata: Optional[Dict[str, str]] = payload.get("metadata")
+        if metadata:
+            # A redo request replaces the entry of the same request without the marker
+            metadata.pop(REDO_METADATA_KEY, None)
+        data = orjson.dumps({"endpoint": endpoint, "request": payload}, option=orjson.OPT_SORT_KEYS)
+        return blake2b(data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def is_cacheable(request: BaseModel) -> bool:
+        """Check whether a response to a request may be cached.
+
+        A request without a conversation creates a new session and
+        conversation, so its response must not be handed to other callers
+        sending the same content.
+
+        Args:
+            request: The request model
+
+        Returns:
+            True if the request continues an existing conversation
+        """
+        return bool(getattr(request, "conversation_id", None))
+
+    @staticmethod
+    def is_redo(request: BaseModel) -> bool:
+        """Check whether a request asks to bypass the cache.
+
+        Args:
+            request: The request model
+
+        Returns:
+            True if the request metadata carries a truthy redo marker
+        """
+        metadata = getattr(request, "metadata", None) or {}
+        return str(metadata.get(REDO_METADATA_KEY, "")).lower() in ("1", "true", "yes")
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached value if it has not expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Serialized value to store
+        """
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """Remove an entry if present.
+
+        Args:
+            key: Cache key
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+
+# Application-wide cache for generated question responses
+response_cache = ResponseCache(
+    ttl_seconds=settings.QUESTION_CACHE_TTL_SECONDS,
+    max_size=settings.QUESTION_CACHE_MAX_SIZE,
+)
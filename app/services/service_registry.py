@@ -2,9 +2,14 @@ from typing import Dict, Any, Type
 import logging
 
 class ServiceRegistry:
-    """Registry for maintaining service references."""
+    """Registry for maintaining service references.
     
-    _services = {}
+    The services dict is never mutated in place: registering rebinds it to
+    an updated copy, so lookups from any thread see either the old or the
+    new mapping and need no lock.
+    """
+    
+    _services: Dict[str, Any] = {}
     
     @classmethod
     def register(cls, service_name: str, service_instance: Any) -> None:
@@ -14,7 +19,7 @@ class ServiceRegistry:
             service_name: Name of the service
             service_instance: Instance of the service
         """
-        cls._services[service_name] = service_instance
+        cls._services = {**cls._services, service_name: service_instance}
     
     @classmethod
     def get(cls, service_name: str) -> Any:
@@ -29,9 +34,10 @@ class ServiceRegistry:
         Raises:
             KeyError: If service is not registered
         """
-        if service_name not in cls._services:
-            raise KeyError(f"Service '{service_name}' not registered")
-        return cls._services[service_name]
+        try:
+            return cls._services[service_name]
+        except KeyError:
+            raise KeyError(f"Service '{service_name}' not registered") from None
     
     @classmethod
     def is_registered(cls, service_name: str) -> bool:
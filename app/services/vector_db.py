@@ -1,72 +1,153 @@
-from typing import List, Dict, Any, Optional, Union
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import grpc
 import numpy as np
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
+from qdrant_client.http.exceptions import ResponseHandlingException
 from langchain_openai import OpenAIEmbeddings
 import os
-import time
 import httpx
+import re
 import uuid
 
 from app.core.config import get_settings
+from app.core.http import get_openai_http_client
 from app.core.logging import app_logger
 from app.core.monitoring import measure_time
+from app.services.batcher import AsyncBatcher
+from app.services.embedding_cache import embedding_cache
+from app.services.query_cache import query_cache
 
 settings = get_settings()
 
+# Canonical hyphenated UUID, the only ID form stored as-is
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+# Searches score candidates on the int8-quantized vectors, fetching twice the
+# requested limit, and rescore those with the original vectors for exact ranking
+SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+
+
+@lru_cache(maxsize=4096)
+def _build_filter(items: Tuple[Tuple[str, Any], ...]) -> models.Filter:
+    """Build a search filter matching every key/value pair, cached per pair set."""
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key=key,
+                match=models.MatchValue(value=value)
+            )
+            for key, value in items
+        ]
+    )
+
+
+def _search_filter(filter_params: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """Get the search filter for filter_params, or None to search everything."""
+    if not filter_params:
+        return None
+    return _build_filter(tuple(sorted(filter_params.items())))
+
+
+class EmbeddingUnavailableError(Exception):
+    """Raised when the embeddings API fails to embed a text."""
+
 
 class VectorDBService:
-    """Service for interacting with Qdrant vector database."""
+    """Service for interacting with Qdrant vector database.
     
-    _instance = None
+    The application shares the module-level vector_db_service instance; use
+    get_instance() rather than constructing the service. A separate instance
+    can be built on a given client and embeddings model, as tests do.
+    """
     
-    def __new__(cls):
-        """Singleton pattern to ensure only one vector db service instance."""
-        if cls._instance is None:
-            cls._instance = super(VectorDBService, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    @classmethod
+    def get_instance(cls) -> "VectorDBService":
+        """Get the shared vector db service instance."""
+        return vector_db_service
     
-    def _initialize(self):
-        """Initialize Qdrant client and OpenAI embeddings."""
+    def __init__(
+        self,
+        client: Optional[AsyncQdrantClient] = None,
+        embeddings: Optional[OpenAIEmbeddings] = None
+    ):
+        """Initialize Qdrant client and OpenAI embeddings.
+        
+        Args:
+            client: Qdrant client to use; by default one is created from settings
+            embeddings: Embeddings model to use; by default one is created from settings
+        """
+        self.client = client if client is not None else self._create_client()
+        
+        self.collection_name = settings.QDRANT_COLLECTION_NAME
+        # Points stored concurrently are upserted together, one request per batch
+        self.upsert_batcher = AsyncBatcher(
+            self._upsert_points,
+            max_batch=settings.VECTOR_UPSERT_MAX_BATCH,
+            max_wait_ms=settings.VECTOR_UPSERT_MAX_WAIT_MS
+        )
+        self.embeddings = embeddings if embeddings is not None else OpenAIEmbeddings(
+            api_key=settings.OPENAI_API_KEY,
+            http_async_client=get_openai_http_client()
+        )
+        
+        app_logger.info(f"Vector DB service initialized with collection '{self.collection_name}'")
+    
+    @staticmethod
+    def _create_client() -> AsyncQdrantClient:
+        """Create a Qdrant client from the connection settings."""
         # Get the Qdrant URL from environment or use host:port if not available
         qdrant_url = os.getenv("QDRANT_URL", None)
         
         if qdrant_url:
             # Initialize with URL
             app_logger.info(f"Connecting to Qdrant using URL: {qdrant_url}")
-            self.client = QdrantClient(url=qdrant_url)
+            connection = {"url": qdrant_url}
         else:
             # Initialize with host and port
             app_logger.info(f"Connecting to Qdrant using Host: {settings.QDRANT_HOST}, Port: {settings.QDRANT_PORT}")
-            self.client = QdrantClient(
-                host=settings.QDRANT_HOST,
-                port=settings.QDRANT_PORT
-            )
+            connection = {"host": settings.QDRANT_HOST, "port": settings.QDRANT_PORT}
         
-        self.collection_name = settings.QDRANT_COLLECTION_NAME
-        self.embeddings = OpenAIEmbeddings(
-            api_key=settings.OPENAI_API_KEY
+        # Requests are served through the async client, so Qdrant round trips do
+        # not block the event loop. With QDRANT_PREFER_GRPC, points and searches
+        # go over gRPC, skipping JSON encoding of the vectors.
+        return AsyncQdrantClient(
+            **connection,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            http2=True,
+            # Without explicit limits the client keeps no idle connections to a
+            # local Qdrant, opening a new one per request
+            limits=httpx.Limits(
+                max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
         )
-        
-        # Try to ensure collection exists with retry
-        self._ensure_collection_exists_with_retry()
-        
-        app_logger.info(f"Vector DB service initialized with collection '{self.collection_name}'")
     
-    def _ensure_collection_exists_with_retry(self, max_retries=5, retry_delay=2):
-        """Create the collection if it doesn't exist, with retry logic."""
+    async def ensure_collection_exists_with_retry(self, max_retries=5, retry_delay=2):
+        """Create the collection if it doesn't exist, with retry logic.
+        
+        Run at application startup rather than on construction, so importing
+        the service never blocks on Qdrant.
+        """
         retries = 0
         while retries < max_retries:
             try:
-                self._ensure_collection_exists()
+                await self._ensure_collection_exists()
                 return
-            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            except (httpx.ConnectError, httpx.ConnectTimeout, ResponseHandlingException, grpc.RpcError) as e:
                 retries += 1
                 app_logger.warning(f"Failed to connect to Qdrant (attempt {retries}/{max_retries}): {str(e)}")
                 if retries < max_retries:
                     app_logger.info(f"Retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
+                    await asyncio.sleep(retry_delay)
                     retry_delay *= 1.5  # Exponential backoff
                 else:
                     app_logger.error(f"Failed to connect to Qdrant after {max_retries} attempts.")
@@ -74,18 +155,27 @@ class VectorDBService:
                     app_logger.warning("Application will continue without vector database functionality.")
                     break
     
-    def _ensure_collection_exists(self):
+    async def _ensure_collection_exists(self):
         """Create the collection if it doesn't exist."""
         try:
-            collections = self.client.get_collections().collections
+            collections = (await self.client.get_collections()).collections
             collection_names = [collection.name for collection in collections]
             
             if self.collection_name not in collection_names:
-                self.client.create_collection(
+                await self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=models.VectorParams(
                         size=1536,  # OpenAI embeddings dimension
-                        distance=models.Distance.COSINE
+                        distance=models.Distance.COSINE,
+                        # Full-precision vectors are only read to rescore candidates
+                        on_disk=True
+                    ),
+                    # Candidates are scored on int8 copies of the vectors kept in RAM
+                    quantization_config=models.ScalarQuantization(
+                        scalar=models.ScalarQuantizationConfig(
+                            type=models.ScalarType.INT8,
+                            always_ram=True
+                        )
                     )
                 )
                 app_logger.info(f"Created new collection '{self.collection_name}' in Qdrant")
@@ -93,6 +183,36 @@ class VectorDBService:
             app_logger.error(f"Error ensuring collection exists: {str(e)}")
             raise
     
+    @asynccontextmanager
+    async def bulk_ingest(self) -> AsyncIterator[None]:
+        """Defer HNSW indexing while a large batch of points is stored.
+        
+        Graph building is switched off for the duration, so stored points are
+        not linked into the index one upsert at a time; on exit the collection's
+        previous settings are restored and Qdrant builds the index once.
+        
+        Usage:
+            async with vector_db_service.bulk_ingest():
+                await vector_db_service.store_embeddings(texts, metadatas)
+        """
+        config = (await self.client.get_collection(self.collection_name)).config
+        await self.client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=models.HnswConfigDiff(m=0),
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            yield
+        finally:
+            await self.client.update_collection(
+                collection_name=self.collection_name,
+                hnsw_config=models.HnswConfigDiff(m=config.hnsw_config.m),
+                optimizers_config=models.OptimizersConfigDiff(
+                    indexing_threshold=config.optimizer_config.indexing_threshold
+                )
+            )
+            app_logger.info(f"Re-enabled indexing for collection '{self.collection_name}' after bulk ingest")
+    
     @measure_time
     async def store_embedding(
         self, 
@@ -114,36 +234,18 @@ class VectorDBService:
             # Generate embedding
             embedding = await self._get_embedding(text)
             
-            # Use provided ID or generate a proper UUID
-            # Always ensure the ID is a UUID string format regardless of input
-            if id is not None:
-                # Try to convert the ID to UUID if it's not already
-                try:
-                    # If it's a numeric ID or other non-UUID format, create a new UUID
-                    if not (id.startswith('{') and id.endswith('}') or '-' in id):
-                        point_id = str(uuid.uuid4())
-                    else:
-                        # If it looks like a UUID, ensure it's properly formatted
-                        point_id = str(uuid.UUID(id))
-                except (ValueError, AttributeError, TypeError):
-                    # If conversion fails, generate a new UUID
-                    point_id = str(uuid.uuid4())
-            else:
-                # Generate a new UUID if none provided
-                point_id = str(uuid.uuid4())
-            
-            # Upsert the point
-            self.client.upsert(
-                collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=point_id,
-                        vector=embedding,
-                        payload=metadata
-                    )
-                ]
+            point_id = self._point_id(id)
+            
+            # Upsert the point along with any others stored meanwhile
+            await self.upsert_batcher.submit(
+                models.PointStruct(
+                    id=point_id,
+                    vector=embedding.tolist(),
+                    payload=metadata
+                )
             )
             
+            query_cache.invalidate(metadata)
             app_logger.debug(f"Stored embedding with ID {point_id} in collection '{self.collection_name}'")
             return point_id
         except Exception as e:
@@ -155,6 +257,75 @@ class VectorDBService:
             # Return a fallback ID if we can't store the embedding
             return id if id is not None else f"fallback-{str(uuid.uuid4())}"
     
+    @measure_time
+    async def store_embeddings(
+        self, 
+        texts: List[str], 
+        metadatas: List[Dict[str, Any]],
+        ids: Optional[List[Optional[str]]] = None
+    ) -> List[str]:
+        """Store several text embeddings in the vector database at once.
+        
+        The texts are embedded in a single API call and stored with a single
+        upsert, instead of one round trip of each per text.
+        
+        Args:
+            texts: The texts to embed and store
+            metadatas: Associated metadata for each text
+            ids: Optional custom ID for each point
+            
+        Returns:
+            IDs of the stored points, in the order of the texts
+        """
+        point_ids = [self._point_id(id) for id in (ids or [None] * len(texts))]
+        if not texts:
+            return point_ids
+        try:
+            embeddings = await self._get_embeddings(texts)
+            
+            await self.client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    models.PointStruct(
+                        id=point_id,
+                        vector=embedding.tolist(),
+                        payload=metadata
+                    )
+                    for point_id, embedding, metadata in zip(point_ids, embeddings, metadatas)
+                ]
+            )
+            
+            for metadata in metadatas:
+                query_cache.invalidate(metadata)
+            app_logger.debug(f"Stored {len(point_ids)} embeddings in collection '{self.collection_name}'")
+            return point_ids
+        except Exception as e:
+            app_logger.error(f"Error storing embeddings: {str(e)}")
+            # Continue execution even if embedding storage fails
+            return [f"fallback-{str(uuid.uuid4())}" for _ in texts]
+    
+    async def _upsert_points(self, points: List[models.PointStruct]) -> List[str]:
+        """Upsert a batch of points in a single request.
+        
+        Args:
+            points: The points to upsert
+            
+        Returns:
+            IDs of the upserted points
+        """
+        await self.client.upsert(collection_name=self.collection_name, points=points)
+        return [point.id for point in points]
+    
+    def _point_id(self, id: Optional[str]) -> str:
+        """Get the point ID to store an embedding under, as a UUID string.
+        
+        IDs already in canonical UUID form are kept; anything else, including
+        None, gets a freshly generated UUID.
+        """
+        if id and _UUID_RE.fullmatch(id):
+            return id.lower()
+        return str(uuid.uuid4())
+    
     @measure_time
     async def search_similar(
         self, 
@@ -176,36 +347,24 @@ class VectorDBService:
             # Generate embedding for query
             query_embedding = await self._get_embedding(query)
             
-            # Prepare search filter
-            search_filter = None
-            if filter_params:
-                search_filter = models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key=key,
-                            match=models.MatchValue(value=value)
-                        )
-                        for key, value in filter_params.items()
-                    ]
-                )
+            # A near-identical query of the same scope reuses its results
+            scope = query_cache.make_scope(filter_params, limit)
+            cached_results = query_cache.get(query_embedding, scope)
+            if cached_results is not None:
+                return cached_results
             
             # Perform search
-            search_results = self.client.search(
+            search_results = await self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                query=query_embedding.tolist(),
                 limit=limit,
-                query_filter=search_filter
+                query_filter=_search_filter(filter_params),
+                # Oversample on the quantized vectors, then rescore with the originals
+                search_params=SEARCH_PARAMS
             )
             
-            # Format results
-            results = []
-            for result in search_results:
-                results.append({
-                    "id": result.id,
-                    "score": result.score,
-                    "payload": result.payload
-                })
-            
+            results = self._format_points(search_results.points)
+            query_cache.set(query_embedding, scope, results)
             app_logger.debug(f"Found {len(results)} similar embeddings for query in '{self.collection_name}'")
             return results
         except Exception as e:
@@ -213,22 +372,125 @@ class VectorDBService:
             # Return empty results if search fails
             return []
     
-    async def _get_embedding(self, text: str) -> List[float]:
+    @measure_time
+    async def search_similar_batch(
+        self, 
+        queries: List[str], 
+        filter_params: Optional[Dict[str, Any]] = None, 
+        limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for embeddings similar to each of several queries at once.
+        
+        The queries are embedded in a single API call, and those not answered
+        by the query cache are searched with a single batched request.
+        
+        Args:
+            queries: The query texts to search for
+            filter_params: Optional filter parameters applied to every query
+            limit: Maximum number of results to return per query
+            
+        Returns:
+            List of search results with score and payload, one per query
+        """
+        if not queries:
+            return []
+        try:
+            query_embeddings = await self._get_embeddings(queries)
+            
+            scope = query_cache.make_scope(filter_params, limit)
+            results = [query_cache.get(embedding, scope) for embedding in query_embeddings]
+            missing = [i for i, cached_results in enumerate(results) if cached_results is None]
+            if missing:
+                search_filter = _search_filter(filter_params)
+                batch_results = await self.client.query_batch_points(
+                    collection_name=self.collection_name,
+                    requests=[
+                        models.QueryRequest(
+                            query=query_embeddings[i].tolist(),
+                            limit=limit,
+                            filter=search_filter,
+                            params=SEARCH_PARAMS,
+                            with_payload=True
+                        )
+                        for i in missing
+                    ]
+                )
+                for i, response in zip(missing, batch_results):
+                    results[i] = self._format_points(response.points)
+                    query_cache.set(query_embeddings[i], scope, results[i])
+            
+            app_logger.debug(f"Ran {len(missing)} of {len(queries)} similarity searches in '{self.collection_name}'")
+            return results
+        except Exception as e:
+            app_logger.error(f"Error searching similar embeddings: {str(e)}")
+            # Return empty results if search fails
+            return [[] for _ in queries]
+    
+    @staticmethod
+    def _format_points(points: List[models.ScoredPoint]) -> List[Dict[str, Any]]:
+        """Format scored points as search results."""
+        return [
+            {
+                "id": point.id,
+                "score": point.score,
+                "payload": point.payload
+            }
+            for point in points
+        ]
+    
+    async def _get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for text using OpenAI.
         
+        Embeddings are kept as float32 arrays, about an eighth of the memory
+        of a list of Python floats while cached; they are converted to lists
+        only when sent to Qdrant.
+        
         Args:
             text: The text to embed
             
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a float32 array
+            
+        Raises:
+            EmbeddingUnavailableError: If the embeddings API call fails
         """
+        # Repeated texts, such as a user message searched on every follow-up,
+        # skip the embedding API round trip
+        embedding = embedding_cache.get(text)
+        if embedding is not None:
+            return embedding
         try:
-            return self.embeddings.embed_query(text)
+            embedding = np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+            embedding_cache.set(text, embedding)
+            return embedding
         except Exception as e:
-            app_logger.error(f"Error generating embedding: {str(e)}")
-            # Return a zero embedding as fallback
-            return [0.0] * 1536  # OpenAI embeddings are 1536-dimensional
+            # No zero-vector fallback: stored, it would match every query
+            raise EmbeddingUnavailableError(f"Error generating embedding: {str(e)}") from e
+    
+    async def _get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Get embeddings for several texts, embedding the uncached ones in one call.
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            Embedding vectors as float32 arrays, in the order of the texts
+            
+        Raises:
+            EmbeddingUnavailableError: If the embeddings API call fails
+        """
+        embeddings = [embedding_cache.get(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            try:
+                computed = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            except Exception as e:
+                raise EmbeddingUnavailableError(f"Error generating embeddings: {str(e)}") from e
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = np.asarray(embedding, dtype=np.float32)
+                embedding_cache.set(texts[i], embeddings[i])
+        return embeddings
 
 
-# Create vector db service instance
+# Application-wide vector db service instance
 vector_db_service = VectorDBService() 
\ No newline at end of file
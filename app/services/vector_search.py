@@ -1,31 +1,25 @@
 from typing import List, Dict, Any, Optional
 import logging
 
-from app.services.vector_db import VectorDBService
+from app.services.vector_db import vector_db_service
 from app.core.monitoring import measure_time
 from app.core.logging import app_logger
 
 class VectorSearchService:
-    """Service for searching vector database with additional functionality."""
+    """Service for searching vector database with additional functionality.
     
-    _instance = None
+    The application shares the module-level vector_search_service instance;
+    use get_instance() rather than constructing the service.
+    """
     
     @classmethod
-    def get_instance(cls):
-        """Get singleton instance of the service."""
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+    def get_instance(cls) -> "VectorSearchService":
+        """Get the shared vector search service instance."""
+        return vector_search_service
     
     def __init__(self):
         """Initialize the vector search service."""
-        # Ensure singleton pattern
-        if VectorSearchService._instance is not None:
-            raise RuntimeError("VectorSearchService is a singleton! Use get_instance() instead.")
-        
-        # Initialize vector DB service
-        self.vector_db_service = VectorDBService()
-        VectorSearchService._instance = self
+        self.vector_db_service = vector_db_service
     
     @measure_time
     async def search_context(
@@ -57,6 +51,36 @@ class VectorSearchService:
         app_logger.debug(f"Vector search found {len(results)} results for query: {query[:50]}...")
         return results
     
+    @measure_time
+    async def search_context_batch(
+        self, 
+        queries: List[str], 
+        conversation_id: Optional[str] = None,
+        limit: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for relevant context for several queries in one round trip.
+        
+        Args:
+            queries: The search query texts
+            conversation_id: Optional conversation ID to filter results
+            limit: Maximum number of results to return per query
+            
+        Returns:
+            List of search results with score and payload, one per query
+        """
+        filter_params = {}
+        if conversation_id:
+            filter_params["conversation_id"] = conversation_id
+        
+        results = await self.vector_db_service.search_similar_batch(
+            queries=queries,
+            filter_params=filter_params,
+            limit=limit
+        )
+        
+        app_logger.debug(f"Vector search ran {len(queries)} queries in one batch")
+        return results
+    
     @measure_time
     async def store_context(
         self,
@@ -78,4 +102,8 @@ class VectorSearchService:
             text=text,
             metadata=metadata,
             id=id
-        ) 
\ No newline at end of file
+        )
+
+
+# Application-wide vector search service instance
+vector_search_service = VectorSearchService()
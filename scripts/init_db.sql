@@ -1,6 +1,6 @@
 -- Create user_sessions table
 CREATE TABLE IF NOT EXISTS user_sessions (
-    id VARCHAR PRIMARY KEY,
+    id UUID PRIMARY KEY,
     user_identifier VARCHAR,
     context TEXT,
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
@@ -13,8 +13,8 @@ CREATE INDEX IF NOT EXISTS ix_user_sessions_user_identifier ON user_sessions (us
 
 -- Create conversations table
 CREATE TABLE IF NOT EXISTS conversations (
-    id VARCHAR PRIMARY KEY,
-    user_session_id VARCHAR NOT NULL,
+    id UUID PRIMARY KEY,
+    user_session_id UUID NOT NULL,
     topic VARCHAR,
     is_active BOOLEAN NOT NULL DEFAULT TRUE,
     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
@@ -22,15 +22,22 @@ CREATE TABLE IF NOT EXISTS conversations (
     FOREIGN KEY (user_session_id) REFERENCES user_sessions (id)
 );
 
+-- Create index on user_session_id
+CREATE INDEX IF NOT EXISTS ix_conv_user_active_created ON conversations (user_session_id, is_active, created_at);
+
 -- Create messages table
 CREATE TABLE IF NOT EXISTS messages (
-    id VARCHAR PRIMARY KEY,
-    conversation_id VARCHAR NOT NULL,
+    id UUID PRIMARY KEY,
+    conversation_id UUID NOT NULL,
     message_type VARCHAR NOT NULL,
     content TEXT NOT NULL,
-    message_metadata TEXT,
+    message_metadata JSONB,
     sequence_number INTEGER NOT NULL,
     created_at TIMESTAMP NOT NULL DEFAULT NOW(),
     updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
     FOREIGN KEY (conversation_id) REFERENCES conversations (id)
-); 
\ No newline at end of file
+);
+
+-- Create index for ordered reads of a conversation's messages
+CREATE INDEX IF NOT EXISTS ix_messages_conv_seq ON messages (conversation_id, sequence_number); 
+CREATE INDEX IF NOT EXISTS ix_messages_conv_type_seq ON messages (conversation_id, message_type, sequence_number);
@@ -1,97 +1,229 @@
-import asyncio
 import os
-from typing import Generator, AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncGenerator, Callable, Dict, Generator
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
 import pytest
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient
+
+# An in-memory SQLite database private to the test process, so each
+# pytest-xdist worker has its own and nothing is written to disk
+TEST_DATABASE_URL = "sqlite+aiosqlite:///file:test_db?mode=memory&cache=shared&uri=true"
+
+# The app builds its database engine when it is imported, so the test
+# settings are in place before any app module is
+os.environ.update({
+    "APP_NAME": "Sequential Questioning MCP Server Test",
+    "APP_VERSION": "0.1.0-test",
+    "DEBUG": "True",
+    "ENVIRONMENT": "test",
+    "DATABASE_URL": TEST_DATABASE_URL,
+    "QDRANT_HOST": "localhost",
+    "QDRANT_PORT": "6333",
+    "QDRANT_COLLECTION_NAME": "test_sequential_questioning",
+    "OPENAI_API_KEY": "sk-test-key",
+    "LLM_MODEL": "gpt-4-turbo",
+    "LLM_WARMUP_ON_STARTUP": "False",
+    "SECRET_KEY": "test-secret-key",
+})
 
 from app.main import app
-from app.models.database import Base, get_db
+from app.models.database import Base, get_db, get_session_factory
 from app.core.config import get_settings, Settings
+from app.core.logging import setup_logging
+from app.schemas.question_generation import QuestionItem, QuestionRequest, QuestionResponse
+from app.services.embedding_cache import embedding_cache
+from app.services.query_cache import query_cache
+from app.services.response_cache import response_cache
+from app.services.vector_db import vector_db_service
+
+# Importing the app configured logging at DEBUG or INFO; tests only keep
+# warnings, so request and SQL logging never reaches the formatters
+setup_logging(log_level="WARNING")
 
 
 # Test settings fixture
 @pytest.fixture(scope="session")
 def test_settings() -> Settings:
-    """Override settings for tests."""
-    os.environ["APP_NAME"] = "Sequential Questioning MCP Server Test"
-    os.environ["APP_VERSION"] = "0.1.0-test"
-    os.environ["DEBUG"] = "True"
-    os.environ["ENVIRONMENT"] = "test"
-    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///./test.db"
-    os.environ["QDRANT_HOST"] = "localhost"
-    os.environ["QDRANT_PORT"] = "6333"
-    os.environ["QDRANT_COLLECTION_NAME"] = "test_sequential_questioning"
-    os.environ["OPENAI_API_KEY"] = "sk-test-key"
-    os.environ["LLM_MODEL"] = "gpt-4-turbo"
-    os.environ["SECRET_KEY"] = "test-secret-key"
-    
+    """Get the settings built from the test environment."""
+    # Settings are cached per process; drop any instance built before the
+    # test environment was applied
+    get_settings.cache_clear()
     return get_settings()
 
 
+# Serve the shared vector db service from an in-memory Qdrant
+@pytest.fixture(scope="session", autouse=True)
+def in_memory_qdrant():
+    """Replace the Qdrant server with Qdrant's in-process local mode."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(vector_db_service, "client", AsyncQdrantClient(location=":memory:"))
+        yield
+
+
+class FakeQuestionGeneration:
+    """Deterministic stand-in for the question generation service.
+    
+    Keeps the ID bookkeeping of the real service: a conversation keeps its
+    session, and a user's new conversations join that user's session.
+    """
+    
+    def __init__(self):
+        self._user_sessions: Dict[str, str] = {}
+        self._conversation_sessions: Dict[str, str] = {}
+    
+    async def generate_question(self, db, request: QuestionRequest) -> QuestionResponse:
+        """Return a fixed batch of questions for the request's conversation."""
+        conversation_id = request.conversation_id or str(uuid4())
+        session_id = (
+            request.session_id
+            or self._conversation_sessions.get(conversation_id)
+            or self._user_sessions.get(request.user_id)
+            or str(uuid4())
+        )
+        self._conversation_sessions[conversation_id] = session_id
+        if request.user_id:
+            self._user_sessions.setdefault(request.user_id, session_id)
+        
+        questions = [
+            QuestionItem(question_text="What are you hoping to achieve?", question_number=1),
+            QuestionItem(question_text="What have you tried so far?", question_number=2),
+        ]
+        return QuestionResponse(
+            current_question=questions[0].question_text,
+            questions=questions,
+            conversation_id=conversation_id,
+            session_id=session_id,
+            total_questions_in_batch=len(questions),
+            metadata={"question_type": "follow_up" if request.conversation_id else "initial"},
+        )
+
+
+# Tests that drive the MCP endpoints without an LLM request this fixture
+@pytest.fixture(scope="session")
+def mock_question_generation() -> Generator[AsyncMock, None, None]:
+    """Replace question generation with a deterministic in-process fake."""
+    fake = FakeQuestionGeneration()
+    with patch("app.mcp.sequential_questioning.question_generation_service") as mock_service:
+        mock_service.generate_question = AsyncMock(side_effect=fake.generate_question)
+        yield mock_service
+
+
 # Test database fixture
 @pytest.fixture(scope="session")
 def test_engine():
     """Create test database engine."""
+    # A single connection held for the whole session keeps the in-memory
+    # database alive, and its tables are created only once
     engine = create_async_engine(
-        "sqlite+aiosqlite:///./test.db",
+        TEST_DATABASE_URL,
         echo=False,
         future=True,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
     )
+    
+    # pysqlite's own transaction handling breaks SAVEPOINTs; let SQLAlchemy
+    # emit BEGIN itself so db_session can roll back nested transactions
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+    
     return engine
 
 
 @pytest.fixture(scope="session")
 async def test_db_setup(test_engine):
-    """Set up test database tables."""
+    """Create the test database tables once for the session."""
     async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
     
     yield
     
-    async with test_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+    await test_engine.dispose()
 
 
 @pytest.fixture
 async def db_session(test_engine, test_db_setup) -> AsyncGenerator[AsyncSession, None]:
-    """Create a database session for tests."""
-    async_session = sessionmaker(
-        test_engine, class_=AsyncSession, expire_on_commit=False, autocommit=False, autoflush=False
-    )
+    """Create a database session whose writes are rolled back after the test.
     
-    async with async_session() as session:
-        yield session
-        await session.rollback()
+    The session is bound to a connection with an open outer transaction.
+    Commits made by the code under test only release a SAVEPOINT, so rolling
+    back the outer transaction discards everything without DELETEs.
+    """
+    async with test_engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            autoflush=False,
+            join_transaction_mode="create_savepoint",
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
 
 
-# Override the database dependency
 @pytest.fixture
-def override_get_db(db_session):
-    """Override the get_db dependency."""
+def test_session_factory(db_session) -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """Get a session factory handing out the test's database session.
+    
+    The session is left open on exit, as it belongs to db_session.
+    """
+    @asynccontextmanager
+    async def _session_factory():
+        yield db_session
+    
+    return _session_factory
+
+
+# Override the database dependencies
+@pytest.fixture
+def override_get_db(db_session, test_session_factory):
+    """Override the get_db and get_session_factory dependencies."""
     async def _override_get_db():
         yield db_session
     
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: test_session_factory
     yield
     app.dependency_overrides.clear()
 
 
-# Test client fixture
-@pytest.fixture
-def test_client(override_get_db, test_settings) -> Generator[TestClient, None, None]:
-    """Create a test client for the app."""
+# Keep cached responses, embeddings and searches from leaking between tests
+@pytest.fixture(autouse=True)
+def clear_response_cache():
+    """Clear the response, embedding and vector search caches around each test."""
+    response_cache.clear()
+    embedding_cache.clear()
+    query_cache.clear()
+    yield
+    response_cache.clear()
+    embedding_cache.clear()
+    query_cache.clear()
+
+
+# The app is started once per test module rather than once per test
+@pytest.fixture(scope="module")
+def app_client(test_settings) -> Generator[TestClient, None, None]:
+    """Start the app for the tests of a module."""
     with TestClient(app) as client:
         yield client
 
 
-# Event loop fixture for async tests
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an event loop for async tests."""
-    policy = asyncio.get_event_loop_policy()
-    loop = policy.new_event_loop()
-    yield loop
-    loop.close() 
\ No newline at end of file
+# Test client fixture
+@pytest.fixture
+def test_client(app_client, override_get_db) -> TestClient:
+    """Get a test client for the app, using the test database session."""
+    return app_client
+
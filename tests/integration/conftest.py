@@ -0,0 +1,98 @@
+from typing import Any, AsyncGenerator, Dict
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.monitoring import metrics
+from app.main import app as main_app
+from app.models.database import get_db, get_session_factory
+
+
+# The LLM is never called from the integration tests
+@pytest.fixture(scope="session", autouse=True)
+def fake_llm(mock_question_generation):
+    """Serve every integration test from the question generation fake."""
+    return mock_question_generation
+
+
+# Building another app would repeat the router and MCP setup already done
+# at import; the integration tests share the module-level instance
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    """Get the app instance shared by the integration tests."""
+    return main_app
+
+
+# One pooled client serves every request of the run, so connections are
+# reused instead of set up per test
+@pytest.fixture(scope="session")
+async def async_client(app) -> AsyncGenerator[httpx.AsyncClient, None]:
+    """Create an async client for the shared app, running its lifespan once."""
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+    # ASGITransport does not send lifespan events, so the app is started here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            limits=limits,
+        ) as client:
+            yield client
+
+
+@pytest.fixture
+def test_client(app, async_client, db_session, test_session_factory) -> httpx.AsyncClient:
+    """Get the async client, with the app using the test database session."""
+    async def _override_get_db():
+        yield db_session
+    
+    app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: test_session_factory
+    yield async_client
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_session_factory, None)
+
+
+class MetricsDelta:
+    """Metrics recorded since a test started, read without resetting the shared counters."""
+    
+    def __init__(self):
+        self._start = metrics.get_metrics()
+    
+    def delta(self) -> Dict[str, Any]:
+        """Get the current metrics, with request and error counts taken from the test's start.
+        
+        The error rates are recomputed from those counts; response times
+        remain the cumulative averages.
+        """
+        current = metrics.get_metrics()
+        result = {
+            **current,
+            "total_requests": current["total_requests"] - self._start["total_requests"],
+            "total_errors": current["total_errors"] - self._start["total_errors"],
+            "endpoints": {},
+        }
+        result["error_rate"] = _error_rate(result["total_errors"], result["total_requests"])
+        
+        for endpoint, stats in current["endpoints"].items():
+            start = self._start["endpoints"].get(endpoint, {})
+            requests = stats["requests"] - start.get("requests", 0)
+            errors = stats["errors"] - start.get("errors", 0)
+            result["endpoints"][endpoint] = {
+                **stats,
+                "requests": requests,
+                "errors": errors,
+                "error_rate": _error_rate(errors, requests),
+            }
+        return result
+
+
+def _error_rate(errors: int, requests: int) -> float:
+    """Share of requests that failed, 0 when there were none."""
+    return errors / requests if requests > 0 else 0
+
+
+@pytest.fixture
+def metrics_delta() -> MetricsDelta:
+    """Snapshot the metrics so a test can assert on what it recorded itself."""
+    return MetricsDelta()
@@ -1,16 +1,24 @@
 import pytest
+import orjson
 from httpx import AsyncClient
-import json
-from unittest.mock import patch, MagicMock
 
-from app.models.user_session import UserSession
-from app.repositories.user_session_repository import UserSessionRepository
-from app.repositories.conversation_repository import ConversationRepository
-from app.repositories.message_repository import MessageRepository
-from app.core.monitoring import Metrics
+from app.repositories import UserSessionRepository
 
+# Request bodies are serialized with orjson and sent as raw content
+_JSON = {"content-type": "application/json"}
 
-@pytest.fixture
+QUESTION_URL = "/mcp-internal/question"
+FOLLOW_UP_URL = "/mcp-internal/question/follow-up"
+METRICS_URL = "/mcp-internal/monitoring/metrics"
+
+# Identifies the user session seeded by test_question_flow_with_existing_session
+SEEDED_USER = "integration-flow-user"
+
+user_session_repository = UserSessionRepository()
+
+
+# Tests only read the request data, so it is built once per module
+@pytest.fixture(scope="module")
 def user_data():
     return {
         "user_id": "test-user-123",
@@ -20,113 +28,69 @@ def user_data():
 
 
 @pytest.mark.asyncio
-async def test_end_to_end_question_flow(test_client: AsyncClient, user_data):
+async def test_end_to_end_question_flow(test_client: AsyncClient, metrics_delta, user_data):
     """
-    Test the complete sequential questioning flow from initial question to follow-up
+    Test the sequential questioning flow from the initial questions to follow-ups
     """
-    # Make sure metrics are reset for this test
-    Metrics().reset()
-    
-    # Step 1: Generate initial question
-    initial_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=user_data
-    )
+    # Step 1: Generate the initial questions
+    initial_response = await test_client.post(QUESTION_URL, content=orjson.dumps(user_data), headers=_JSON)
     assert initial_response.status_code == 200
     initial_data = initial_response.json()
     
     # Verify structure of response
-    assert "question" in initial_data
-    assert "conversation_id" in initial_data
-    assert "session_id" in initial_data
-    
-    # Get the conversation ID for follow-up
+    assert initial_data["questions"]
+    assert initial_data["current_question"].startswith("1. ")
+    assert initial_data["metadata"]["question_type"] == "initial"
     conversation_id = initial_data["conversation_id"]
+    session_id = initial_data["session_id"]
     
-    # Step 2: Add a simulated user response to the message
-    user_answer = {
-        "user_id": user_data["user_id"],
-        "conversation_id": conversation_id,
-        "message": "I'm interested in family coverage options."
-    }
-    
-    # This would typically be done by a frontend client, saving message for conversation continuity
-    # In a real scenario, there might be a separate endpoint for this
-    
-    # Step 3: Generate a follow-up question
-    follow_up_data = {
-        "user_id": user_data["user_id"],
-        "context": user_data["context"],
-        "conversation_id": conversation_id,
-        "previous_messages": [
-            {"role": "assistant", "content": initial_data["question"]},
-            {"role": "user", "content": user_answer["message"]}
+    # Step 2: Answer the questions and get follow-ups; each answer builds on
+    # the conversation so far, so the exchanges run one after another
+    previous_messages = []
+    for answer in ["I'm interested in family coverage options.", "Mostly dental and vision."]:
+        previous_messages += [
+            {"role": "assistant", "content": initial_data["current_question"]},
+            {"role": "user", "content": answer},
         ]
-    }
-    
-    follow_up_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=follow_up_data
-    )
-    
-    assert follow_up_response.status_code == 200
-    follow_up_data = follow_up_response.json()
-    
-    # Verify the follow-up question structure
-    assert "question" in follow_up_data
-    assert "conversation_id" in follow_up_data
-    assert follow_up_data["conversation_id"] == conversation_id
-    assert "session_id" in follow_up_data
-    
-    # Step 4: Check monitoring metrics to verify request tracking
-    metrics_response = await test_client.get("/mcp-internal/monitoring/metrics")
+        follow_up_request = {
+            **user_data,
+            "conversation_id": conversation_id,
+            "previous_messages": previous_messages,
+        }
+        follow_up_response = await test_client.post(
+            FOLLOW_UP_URL, content=orjson.dumps(follow_up_request), headers=_JSON
+        )
+        assert follow_up_response.status_code == 200
+        follow_up_data = follow_up_response.json()
+        
+        # The follow-up stays in the same conversation and session
+        assert follow_up_data["conversation_id"] == conversation_id
+        assert follow_up_data["session_id"] == session_id
+        assert follow_up_data["metadata"]["question_type"] == "follow_up"
+    
+    # Step 3: Check the metrics recorded the three question requests
+    metrics_response = await test_client.get(METRICS_URL)
     assert metrics_response.status_code == 200
+    assert "endpoints" in metrics_response.json()
     
-    metrics_data = metrics_response.json()
-    assert metrics_data["total_requests"] >= 2  # At least our two question requests
-    assert metrics_data["success_count"] >= 2
-    assert "avg_response_time" in metrics_data
-    assert "status_codes" in metrics_data
+    metrics = metrics_delta.delta()
+    assert metrics["total_requests"] == 3
+    assert metrics["total_errors"] == 0
+    assert metrics["endpoints"]["sequential_questioning"]["requests"] == 1
+    assert metrics["endpoints"]["sequential_questioning_follow_up"]["requests"] == 2
 
 
 @pytest.mark.asyncio
-async def test_persistence_across_requests(test_client: AsyncClient, user_data):
+async def test_follow_up_requires_previous_messages(test_client: AsyncClient, metrics_delta, user_data):
     """
-    Test that user sessions and conversations persist correctly across multiple requests
+    Test that a follow-up without answers is rejected and counted as an error
     """
-    # Step 1: Generate initial question and capture IDs
-    initial_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=user_data
-    )
-    assert initial_response.status_code == 200
-    initial_data = initial_response.json()
-    
-    session_id = initial_data["session_id"]
-    conversation_id = initial_data["conversation_id"]
+    response = await test_client.post(FOLLOW_UP_URL, content=orjson.dumps(user_data), headers=_JSON)
+    assert response.status_code == 400
     
-    # Step 2: Make a second request with the same conversation_id
-    follow_up_data = {
-        "user_id": user_data["user_id"],
-        "context": user_data["context"],
-        "conversation_id": conversation_id,
-        "previous_messages": [
-            {"role": "assistant", "content": initial_data["question"]},
-            {"role": "user", "content": "Yes, I have a question about deductibles"}
-        ]
-    }
-    
-    follow_up_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=follow_up_data
-    )
-    
-    assert follow_up_response.status_code == 200
-    follow_up_data = follow_up_response.json()
-    
-    # Verify the same conversation and session are used
-    assert follow_up_data["conversation_id"] == conversation_id
-    assert follow_up_data["session_id"] == session_id
+    metrics = metrics_delta.delta()
+    assert metrics["total_errors"] == 1
+    assert metrics["endpoints"]["sequential_questioning_follow_up"]["errors"] == 1
 
 
 @pytest.mark.asyncio
@@ -134,29 +98,47 @@ async def test_new_conversation_in_same_session(test_client: AsyncClient, user_d
     """
     Test starting a new conversation within the same user session
     """
-    # Step 1: Generate initial question for first conversation
-    initial_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=user_data
-    )
+    initial_response = await test_client.post(QUESTION_URL, content=orjson.dumps(user_data), headers=_JSON)
+    assert initial_response.status_code == 200
     initial_data = initial_response.json()
-    session_id = initial_data["session_id"]
-    
-    # Step 2: Start a new conversation (omit conversation_id) in the same session
-    new_conversation_data = {
-        "user_id": user_data["user_id"],
-        "context": "New topic about retirement benefits",
-        "previous_messages": []
-    }
     
+    # Start a new conversation (omit conversation_id) for the same user
+    new_conversation_request = {**user_data, "context": "New topic about retirement benefits"}
     new_conv_response = await test_client.post(
-        "/mcp/sequential-questioning",
-        json=new_conversation_data
+        QUESTION_URL, content=orjson.dumps(new_conversation_request), headers=_JSON
     )
-    
     assert new_conv_response.status_code == 200
     new_conv_data = new_conv_response.json()
     
     # Verify we get the same session but a different conversation
-    assert new_conv_data["session_id"] == session_id
-    assert new_conv_data["conversation_id"] != initial_data["conversation_id"] 
\ No newline at end of file
+    assert new_conv_data["session_id"] == initial_data["session_id"]
+    assert new_conv_data["conversation_id"] != initial_data["conversation_id"]
+
+
+@pytest.mark.asyncio
+async def test_question_flow_with_existing_session(test_client: AsyncClient, db_session, user_data):
+    """
+    Test that questions for a stored user session are generated in that session
+    """
+    user_session = await user_session_repository.create(
+        db_session, obj_in={"user_identifier": SEEDED_USER, "context": user_data["context"]}
+    )
+    
+    request = {**user_data, "user_id": SEEDED_USER, "session_id": user_session.id}
+    response = await test_client.post(QUESTION_URL, content=orjson.dumps(request), headers=_JSON)
+    assert response.status_code == 200
+    assert response.json()["session_id"] == user_session.id
+    
+    # The session was committed, and is found again by its user identifier
+    stored = await user_session_repository.get_by_user_identifier(db_session, user_identifier=SEEDED_USER)
+    assert stored is not None
+    assert stored.id == user_session.id
+
+
+@pytest.mark.asyncio
+async def test_database_writes_rolled_back(db_session):
+    """
+    Test that the session stored by the previous test did not outlive it
+    """
+    stored = await user_session_repository.get_by_user_identifier(db_session, user_identifier=SEEDED_USER)
+    assert stored is None
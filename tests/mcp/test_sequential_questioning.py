@@ -86,4 +86,27 @@ def test_sequential_questioning_endpoint_error(test_client, mock_question_genera
     assert response.status_code == 500
     data = response.json()
     assert "detail" in data
-    assert "Failed to generate question" in data["detail"] 
\ No newline at end of file
+    assert "Failed to generate question" in data["detail"] 
+
+def test_follow_up_responses_are_cached_only_within_a_conversation(test_client, mock_question_generation):
+    """Test that repeated requests creating a conversation are never served from the cache."""
+    request_data = {
+        "context": "Testing the follow-up cache",
+        "previous_messages": [{"role": "user", "content": "I answered the first question"}]
+    }
+    
+    # Without a conversation, each caller gets a conversation of its own
+    first = test_client.post("/mcp-internal/question/follow-up", json=request_data)
+    second = test_client.post("/mcp-internal/question/follow-up", json=request_data)
+    assert first.status_code == second.status_code == 200
+    assert first.json()["conversation_id"] != second.json()["conversation_id"]
+    
+    # A repeated request within a conversation is served from the cache
+    request_data["conversation_id"] = first.json()["conversation_id"]
+    calls = mock_question_generation.generate_question.await_count
+    repeated = [
+        test_client.post("/mcp-internal/question/follow-up", json=request_data)
+        for _ in range(2)
+    ]
+    assert repeated[0].json() == repeated[1].json()
+    assert mock_question_generation.generate_question.await_count == calls + 1
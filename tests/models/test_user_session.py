@@ -1,5 +1,4 @@
 import pytest
-from sqlalchemy.future import select
 
 from app.models.user_session import UserSession
 
@@ -15,19 +14,18 @@ async def test_user_session_create(db_session):
     )
     
     db_session.add(user_session)
-    await db_session.commit()
+    await db_session.flush()
     
-    # Retrieve the user session from the database
-    result = await db_session.execute(select(UserSession).where(UserSession.user_identifier == "test_user"))
-    retrieved_session = result.scalars().first()
+    # Reload the row's column values, including the database-side defaults
+    await db_session.refresh(user_session)
     
     # Assert that the session was created and has the correct attributes
-    assert retrieved_session is not None
-    assert retrieved_session.user_identifier == "test_user"
-    assert retrieved_session.context == "Test context"
-    assert retrieved_session.is_active is True
-    assert retrieved_session.created_at is not None
-    assert retrieved_session.updated_at is not None
+    assert user_session.id is not None
+    assert user_session.user_identifier == "test_user"
+    assert user_session.context == "Test context"
+    assert user_session.is_active is True
+    assert user_session.created_at is not None
+    assert user_session.updated_at is not None
 
 
 @pytest.mark.asyncio
@@ -41,21 +39,19 @@ async def test_user_session_update(db_session):
     )
     
     db_session.add(user_session)
-    await db_session.commit()
+    await db_session.flush()
     
     # Update the user session
     user_session.context = "Updated context"
     user_session.is_active = False
-    await db_session.commit()
+    await db_session.flush()
     
-    # Retrieve the updated user session
-    result = await db_session.execute(select(UserSession).where(UserSession.user_identifier == "update_user"))
-    updated_session = result.scalars().first()
+    # Reload the updated row
+    await db_session.refresh(user_session)
     
     # Assert that the session was updated
-    assert updated_session is not None
-    assert updated_session.context == "Updated context"
-    assert updated_session.is_active is False
+    assert user_session.context == "Updated context"
+    assert user_session.is_active is False
 
 
 @pytest.mark.asyncio
@@ -69,15 +65,14 @@ async def test_user_session_delete(db_session):
     )
     
     db_session.add(user_session)
-    await db_session.commit()
+    await db_session.flush()
     
     # Delete the user session
     await db_session.delete(user_session)
-    await db_session.commit()
+    await db_session.flush()
     
-    # Try to retrieve the deleted user session
-    result = await db_session.execute(select(UserSession).where(UserSession.user_identifier == "delete_user"))
-    deleted_session = result.scalars().first()
+    # Try to retrieve the deleted user session by its primary key
+    deleted_session = await db_session.get(UserSession, user_session.id)
     
     # Assert that the session was deleted
     assert deleted_session is None 
\ No newline at end of file
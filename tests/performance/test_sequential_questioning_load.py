@@ -1,131 +1,287 @@
+import asyncio
+import os
 import time
-import statistics
-import concurrent.futures
+from pathlib import Path
+import httpx
+import numpy as np
+import orjson
 import pytest
-from fastapi.testclient import TestClient
 
 from app.main import app
 from app.core.monitoring import Metrics
 
+# Question generation is faked and Qdrant runs in memory, so the load tests
+# measure the app's own request handling rather than upstream latency
+pytestmark = pytest.mark.usefixtures("mock_question_generation")
+
+# Request bodies are serialized with orjson and sent as raw content
+_JSON = {"content-type": "application/json"}
+
+# Metrics name of the endpoint under load
+QUESTION_ENDPOINT = "sequential_questioning"
+
+# Concurrency levels swept by the concurrent load test
+CONCURRENCY_LEVELS = [1, 4, 8, 16, 24, 32]
+
+# P90 response times per concurrency level; set UPDATE_PERF_BASELINES=1 to
+# record the current run's values
+BASELINES_FILE = Path(__file__).parent / "baselines" / "concurrent_load.json"
+
+# Allowed P90 slowdown relative to the baseline. Millisecond latencies on
+# shared machines slow down by over 2x when the host is busy, so only a
+# tripling counts as a regression
+P90_REGRESSION_TOLERANCE = 2.0
+
+# Runs per concurrency level and in-flight cap. Load from elsewhere on the
+# machine only ever adds latency, so the best of the runs is compared
+LOAD_REPEATS = 5
+
+# Caps on in-flight requests swept by the in-flight test, and the number of
+# requests sent at each cap
+MAX_IN_FLIGHT_LEVELS = [8, 16, 24, 32]
+IN_FLIGHT_SWEEP_REQUESTS = 96
+
+# The in-flight cap with the best throughput, recorded like the P90 baselines
+KNEE_BASELINE_FILE = Path(__file__).parent / "baselines" / "in_flight_knee.json"
+
+# Allowed throughput shortfall of the recorded knee relative to the best cap
+# of the same run; throughput is too noisy to require the exact same knee
+KNEE_THROUGHPUT_TOLERANCE = 0.25
+
 @pytest.fixture(scope="module")
-def test_client():
-    with TestClient(app) as client:
-        yield client
-
-def make_request(client, user_id="test_user", context="test context"):
-    """Helper function to make a request to the sequential questioning endpoint"""
-    start_time = time.time()
-    response = client.post(
-        "/mcp/sequential-questioning", 
-        json={
+async def test_client():
+    """Async client whose kept-alive connections are shared by all requests of the module"""
+    limits = httpx.Limits(max_keepalive_connections=32, keepalive_expiry=30.0)
+    # ASGITransport does not send lifespan events, so the app is started here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            limits=limits,
+        ) as client:
+            # Warm up the app's code paths and the client's connections, so the
+            # first measured level is not charged for them
+            await run_load(client, max(CONCURRENCY_LEVELS))
+            yield client
+
+async def make_request(client, user_id="test_user", context="test context"):
+    """Helper function to make a request to the sequential questioning endpoint
+    
+    Returns:
+        The response status code and the response time in seconds
+    """
+    start_time = time.perf_counter()
+    response = await client.post(
+        "/mcp-internal/question",
+        content=orjson.dumps({
             "user_id": user_id,
             "context": context,
             "previous_messages": []
-        }
+        }),
+        headers=_JSON
     )
-    end_time = time.time()
-    return {
-        "status_code": response.status_code,
-        "response_time": end_time - start_time,
-        "success": response.status_code == 200
-    }
-
-def test_sequential_questioning_single_request(test_client):
+    end_time = time.perf_counter()
+    return response.status_code, end_time - start_time
+
+async def test_sequential_questioning_single_request(test_client):
     """Test a single request to establish baseline performance"""
     # Reset metrics
-    test_client.post("/mcp-internal/monitoring/reset")
+    await test_client.post("/mcp-internal/monitoring/metrics/reset")
     
     # Make a single request
-    result = make_request(test_client)
+    status_code, response_time = await make_request(test_client)
     
     # Assertions
-    assert result["status_code"] == 200
-    assert result["response_time"] > 0
+    assert status_code == 200
+    assert response_time > 0
     
     # Check metrics
-    metrics_response = test_client.get("/mcp-internal/monitoring/metrics")
+    metrics_response = await test_client.get("/mcp-internal/monitoring/metrics")
     metrics = metrics_response.json()
     
     assert metrics["total_requests"] == 1
-    assert metrics["successful_requests"] == 1
-    assert len(metrics["response_times"]) == 1
+    assert metrics["total_errors"] == 0
+    assert metrics["endpoints"][QUESTION_ENDPOINT]["requests"] == 1
 
-def test_sequential_questioning_concurrent_load(test_client):
-    """Test the endpoint under concurrent load with multiple requests"""
-    # Reset metrics
-    test_client.post("/mcp-internal/monitoring/reset")
+async def run_load(client, n_requests, max_in_flight=None):
+    """Make n_requests concurrent requests and summarize their latency
     
-    # Number of concurrent requests
-    n_requests = 5
+    Args:
+        client: The client to send the requests with
+        n_requests: Number of requests to send
+        max_in_flight: Most requests awaiting a response at once; unlimited if None
     
-    # Make concurrent requests
-    with concurrent.futures.ThreadPoolExecutor(max_workers=n_requests) as executor:
-        futures = [executor.submit(make_request, test_client, f"user_{i}", f"context for user {i}") 
-                  for i in range(n_requests)]
-        results = [future.result() for future in concurrent.futures.as_completed(futures)]
+    Returns:
+        The response times in seconds, the number of successful requests, the
+        throughput in requests per second, and the median and 90th percentile
+        response times in seconds
+    """
+    semaphore = asyncio.Semaphore(max_in_flight or n_requests)
+    # Each request writes its own slot; the event loop runs one at a time
+    response_times = np.empty(n_requests, dtype=np.float64)
+    success_count = 0
     
-    # Analyze results
-    response_times = [result["response_time"] for result in results]
-    success_count = sum(1 for result in results if result["success"])
+    async def _limited_request(i):
+        nonlocal success_count
+        async with semaphore:
+            status_code, response_times[i] = await make_request(client, f"user_{i}", f"context for user {i}")
+        if status_code == 200:
+            success_count += 1
     
-    # Log performance metrics
+    # Make concurrent requests on the event loop, sharing the client's connections
+    start_time = time.perf_counter()
+    await asyncio.gather(*(_limited_request(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start_time
+    
+    rps = n_requests / elapsed
+    p50, p90 = np.percentile(response_times, [50, 90])
+    return response_times, success_count, rps, p50, p90
+
+def load_baselines(path=BASELINES_FILE):
+    """Load stored performance baselines"""
+    if not path.exists():
+        return {}
+    return orjson.loads(path.read_bytes())
+
+def save_baselines(baselines, path=BASELINES_FILE):
+    """Write performance baselines back to their file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(orjson.dumps(baselines, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+def record_baseline(n_requests, p90):
+    """Store the P90 measured at a concurrency level as its new baseline"""
+    baselines = load_baselines()
+    baselines[str(n_requests)] = float(p90)
+    save_baselines(baselines)
+
+@pytest.mark.slow
+@pytest.mark.parametrize("n_requests", CONCURRENCY_LEVELS)
+async def test_sequential_questioning_concurrent_load(test_client, n_requests):
+    """Test the endpoint under concurrent load at increasing concurrency levels
+    
+    Sweeping the levels shows where throughput stops improving and latency
+    starts to climb; each level's P90 is checked against its stored baseline.
+    """
+    # Reset metrics
+    await test_client.post("/mcp-internal/monitoring/metrics/reset")
+    
+    p90s = []
+    for _ in range(LOAD_REPEATS):
+        response_times, success_count, rps, p50, p90 = await run_load(test_client, n_requests)
+        assert success_count == n_requests, f"Expected all requests to succeed, but got {success_count}/{n_requests}"
+        p90s.append(p90)
+    p90 = min(p90s)
+    
+    # Log performance metrics of the last run, and the best P90 of all runs
     print(f"\nLoad Test Results:")
     print(f"Total Requests: {n_requests}")
     print(f"Successful Requests: {success_count}")
     print(f"Failure Rate: {(n_requests - success_count) / n_requests * 100:.2f}%")
-    print(f"Avg Response Time: {statistics.mean(response_times):.4f}s")
-    print(f"Min Response Time: {min(response_times):.4f}s")
-    print(f"Max Response Time: {max(response_times):.4f}s")
-    if len(response_times) > 1:
-        print(f"Std Dev Response Time: {statistics.stdev(response_times):.4f}s")
+    print(f"Throughput: {rps:.2f} requests/s")
+    print(f"Avg Response Time: {response_times.mean():.4f}s")
+    print(f"P50 Response Time: {p50:.4f}s")
+    print(f"P90 Response Time: {p90:.4f}s")
+    print(f"Min Response Time: {response_times.min():.4f}s")
+    print(f"Max Response Time: {response_times.max():.4f}s")
+    print(f"Std Dev Response Time: {response_times.std():.4f}s")
+    print(f"Best P90 Response Time of {LOAD_REPEATS} runs: {p90:.4f}s")
     
-    # Assertions
-    assert success_count == n_requests, f"Expected all requests to succeed, but got {success_count}/{n_requests}"
+    # Compare against the baseline, or record a new one when asked to
+    if os.environ.get("UPDATE_PERF_BASELINES"):
+        record_baseline(n_requests, p90)
+    else:
+        baseline = load_baselines().get(str(n_requests))
+        if baseline is None:
+            pytest.fail(
+                f"No P90 baseline for concurrency {n_requests} in {BASELINES_FILE.name}; "
+                "record one with UPDATE_PERF_BASELINES=1"
+            )
+        assert p90 <= baseline * (1 + P90_REGRESSION_TOLERANCE), (
+            f"P90 at concurrency {n_requests} regressed: {p90:.4f}s vs baseline {baseline:.4f}s"
+        )
     
     # Check metrics
-    metrics_response = test_client.get("/mcp-internal/monitoring/metrics")
+    metrics_response = await test_client.get("/mcp-internal/monitoring/metrics")
     metrics = metrics_response.json()
     
-    assert metrics["total_requests"] == n_requests
-    assert metrics["successful_requests"] == n_requests
-    assert len(metrics["response_times"]) == n_requests
+    assert metrics["total_requests"] == n_requests * LOAD_REPEATS
+    assert metrics["total_errors"] == 0
+    assert metrics["endpoints"][QUESTION_ENDPOINT]["requests"] == n_requests * LOAD_REPEATS
+
+@pytest.mark.slow
+async def test_sequential_questioning_in_flight_sweep(test_client):
+    """Test throughput and tail latency under increasing caps on in-flight requests
+    
+    The cap with the best throughput is the concurrency knee; the test fails
+    when the recorded knee falls well short of the best cap's throughput.
+    """
+    # The caps take turns, so a slowdown of the machine mid-sweep hits them
+    # all alike; each cap's best throughput is compared
+    runs = {max_in_flight: [] for max_in_flight in MAX_IN_FLIGHT_LEVELS}
+    for _ in range(LOAD_REPEATS):
+        for max_in_flight in MAX_IN_FLIGHT_LEVELS:
+            _, success_count, rps, p50, p90 = await run_load(test_client, IN_FLIGHT_SWEEP_REQUESTS, max_in_flight)
+            
+            assert success_count == IN_FLIGHT_SWEEP_REQUESTS, (
+                f"Expected all requests to succeed at {max_in_flight} in flight, "
+                f"but got {success_count}/{IN_FLIGHT_SWEEP_REQUESTS}"
+            )
+            runs[max_in_flight].append(rps)
+            print(f"\nMax In Flight {max_in_flight}: {rps:.2f} requests/s, P50 {p50:.4f}s, P90 {p90:.4f}s")
+    sweep = {max_in_flight: max(rps) for max_in_flight, rps in runs.items()}
+    
+    best_max_in_flight = max(sweep, key=sweep.get)
+    print(f"Best Max In Flight: {best_max_in_flight}")
+    
+    # Compare against the recorded knee, or record a new one when asked to
+    if os.environ.get("UPDATE_PERF_BASELINES"):
+        save_baselines({"best_max_in_flight": best_max_in_flight}, KNEE_BASELINE_FILE)
+    else:
+        baseline = load_baselines(KNEE_BASELINE_FILE).get("best_max_in_flight")
+        if baseline not in sweep:
+            pytest.fail(
+                f"No in-flight knee among {MAX_IN_FLIGHT_LEVELS} in {KNEE_BASELINE_FILE.name}; "
+                "record one with UPDATE_PERF_BASELINES=1"
+            )
+        assert sweep[baseline] >= sweep[best_max_in_flight] * (1 - KNEE_THROUGHPUT_TOLERANCE), (
+            f"Throughput knee moved from {baseline} to {best_max_in_flight} requests in flight: "
+            f"{sweep[baseline]:.2f} vs {sweep[best_max_in_flight]:.2f} requests/s"
+        )
 
-def test_sequential_questioning_sequential_load(test_client):
+@pytest.mark.slow
+async def test_sequential_questioning_sequential_load(test_client):
     """Test the endpoint under sequential load with multiple requests"""
     # Reset metrics
-    test_client.post("/mcp-internal/monitoring/reset")
+    await test_client.post("/mcp-internal/monitoring/metrics/reset")
     
     # Number of sequential requests
     n_requests = 3
     
     # Make sequential requests
-    results = []
+    response_times = np.empty(n_requests, dtype=np.float64)
+    success_count = 0
     for i in range(n_requests):
-        result = make_request(test_client, f"user_{i}", f"context for user {i}")
-        results.append(result)
-    
-    # Analyze results
-    response_times = [result["response_time"] for result in results]
-    success_count = sum(1 for result in results if result["success"])
+        status_code, response_times[i] = await make_request(test_client, f"user_{i}", f"context for user {i}")
+        if status_code == 200:
+            success_count += 1
     
     # Log performance metrics
     print(f"\nSequential Load Test Results:")
     print(f"Total Requests: {n_requests}")
     print(f"Successful Requests: {success_count}")
     print(f"Failure Rate: {(n_requests - success_count) / n_requests * 100:.2f}%")
-    print(f"Avg Response Time: {statistics.mean(response_times):.4f}s")
-    print(f"Min Response Time: {min(response_times):.4f}s")
-    print(f"Max Response Time: {max(response_times):.4f}s")
-    if len(response_times) > 1:
-        print(f"Std Dev Response Time: {statistics.stdev(response_times):.4f}s")
+    print(f"Avg Response Time: {response_times.mean():.4f}s")
+    print(f"Min Response Time: {response_times.min():.4f}s")
+    print(f"Max Response Time: {response_times.max():.4f}s")
+    print(f"Std Dev Response Time: {response_times.std():.4f}s")
     
     # Assertions
     assert success_count == n_requests, f"Expected all requests to succeed, but got {success_count}/{n_requests}"
     
     # Check metrics
-    metrics_response = test_client.get("/mcp-internal/monitoring/metrics")
+    metrics_response = await test_client.get("/mcp-internal/monitoring/metrics")
     metrics = metrics_response.json()
     
     assert metrics["total_requests"] == n_requests
-    assert metrics["successful_requests"] == n_requests
-    assert len(metrics["response_times"]) == n_requests 
\ No newline at end of file
+    assert metrics["total_errors"] == 0
+    assert metrics["endpoints"][QUESTION_ENDPOINT]["requests"] == n_requests 
\ No newline at end of file
@@ -0,0 +1,31 @@
+import pytest
+
+from app.repositories.conversation import ConversationRepository
+from app.repositories.message import MessageRepository
+from app.repositories.user_session import UserSessionRepository
+from app.schemas.conversation import ConversationCreate
+from app.schemas.user_session import UserSessionCreate
+
+
+@pytest.mark.asyncio
+async def test_message_repository_append_many(db_session):
+    """Test appending messages numbers them after the conversation's last message."""
+    session = await UserSessionRepository().create(
+        db_session, obj_in=UserSessionCreate(user_identifier="append_repo_user", is_active=True)
+    )
+    conversation = await ConversationRepository().create(
+        db_session, obj_in=ConversationCreate(user_session_id=session.id, topic="Append topic", is_active=True)
+    )
+    repo = MessageRepository()
+    
+    first = await repo.append_many(db_session, conversation_id=conversation.id, objs_in=[
+        {"message_type": "question", "content": f"Question {i}"} for i in range(3)
+    ])
+    second = await repo.append_many(db_session, conversation_id=conversation.id, objs_in=[
+        {"message_type": "answer", "content": "Answer"}
+    ])
+    
+    assert [m.content for m in first] == ["Question 0", "Question 1", "Question 2"]
+    assert [m.sequence_number for m in first] == [1, 2, 3]
+    assert second[0].sequence_number == 4
+    assert await repo.get_next_sequence_number(db_session, conversation_id=conversation.id) == 5
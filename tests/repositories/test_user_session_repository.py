@@ -1,7 +1,9 @@
 import pytest
 from uuid import uuid4
 
+from app.repositories.conversation import ConversationRepository
 from app.repositories.user_session import UserSessionRepository
+from app.schemas.conversation import ConversationCreate
 from app.schemas.user_session import UserSessionCreate, UserSessionUpdate
 
 
@@ -25,6 +27,26 @@ async def test_user_session_repository_create(db_session):
     assert created_session.id is not None
 
 
+@pytest.mark.asyncio
+async def test_user_session_repository_create_many(db_session):
+    """Test creating several user sessions in one batch via repository."""
+    repo = UserSessionRepository()
+    
+    sessions_data = [
+        UserSessionCreate(user_identifier=f"batch_repo_user_{i}", context="Batch context", is_active=True)
+        for i in range(3)
+    ]
+    
+    created_sessions = await repo.create_many(db_session, objs_in=sessions_data)
+    
+    assert [s.user_identifier for s in created_sessions] == [
+        "batch_repo_user_0", "batch_repo_user_1", "batch_repo_user_2"
+    ]
+    for created_session in created_sessions:
+        retrieved_session = await repo.get(db_session, id=created_session.id)
+        assert retrieved_session is not None
+
+
 @pytest.mark.asyncio
 async def test_user_session_repository_get(db_session):
     """Test retrieving a user session via repository."""
@@ -130,22 +152,25 @@ async def test_user_session_repository_get_active_sessions(db_session):
     """Test getting all active user sessions."""
     repo = UserSessionRepository()
     
-    # Create some active and inactive sessions
-    for i in range(3):
-        session_data = UserSessionCreate(
-            user_identifier=f"active_user_{i}",
-            context=f"Active context {i}",
-            is_active=True
-        )
-        await repo.create(db_session, obj_in=session_data)
-        
-    for i in range(2):
-        session_data = UserSessionCreate(
-            user_identifier=f"inactive_user_{i}",
-            context=f"Inactive context {i}",
-            is_active=False
-        )
-        await repo.create(db_session, obj_in=session_data)
+    # Create some active and inactive sessions in one insert
+    await repo.create_many(db_session, objs_in=[
+        *(
+            UserSessionCreate(
+                user_identifier=f"active_user_{i}",
+                context=f"Active context {i}",
+                is_active=True
+            )
+            for i in range(3)
+        ),
+        *(
+            UserSessionCreate(
+                user_identifier=f"inactive_user_{i}",
+                context=f"Inactive context {i}",
+                is_active=False
+            )
+            for i in range(2)
+        ),
+    ])
     
     # Get active sessions
     active_sessions = await repo.get_active_sessions(db_session)
@@ -175,4 +200,25 @@ async def test_user_session_repository_deactivate_session(db_session):
     
     assert deactivated_session is not None
     assert deactivated_session.id == session_id
-    assert deactivated_session.is_active is False 
\ No newline at end of file
+    assert deactivated_session.is_active is False 
+
+
+@pytest.mark.asyncio
+async def test_user_session_repository_get_with_conversations(db_session):
+    """Test retrieving a user session with its conversations eagerly loaded."""
+    repo = UserSessionRepository()
+    conversation_repo = ConversationRepository()
+    
+    created_session = await repo.create(
+        db_session, obj_in=UserSessionCreate(user_identifier="eager_user", is_active=True)
+    )
+    for topic in ("first", "second"):
+        await conversation_repo.create(
+            db_session, obj_in=ConversationCreate(user_session_id=created_session.id, topic=topic)
+        )
+    
+    session = await repo.get_with_conversations(db_session, id=created_session.id)
+    
+    # Accessing an unloaded relationship would fail outside a greenlet
+    assert sorted(c.topic for c in session.conversations) == ["first", "second"]
+    assert await repo.get_with_conversations(db_session, id="not-a-uuid") is None
@@ -0,0 +1 @@
+# Schemas test package 
\ No newline at end of file
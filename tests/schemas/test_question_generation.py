@@ -0,0 +1,33 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.question_generation import MAX_PREVIOUS_MESSAGES, MessageItem, QuestionRequest
+
+
+def test_message_requires_role_and_content():
+    """Test that previous messages without a role or content are rejected."""
+    with pytest.raises(ValidationError):
+        QuestionRequest(context="Test context", previous_messages=[{"role": "user"}])
+    
+    with pytest.raises(ValidationError):
+        QuestionRequest(context="Test context", previous_messages=[{"content": "Hello"}])
+
+
+def test_metadata_values_must_be_strings():
+    """Test that request metadata only accepts string values."""
+    with pytest.raises(ValidationError):
+        QuestionRequest(context="Test context", metadata={"attempt": {"nested": "value"}})
+
+
+def test_previous_messages_keep_most_recent():
+    """Test that only the most recent previous messages are kept."""
+    messages = [
+        MessageItem(role="user", content=f"Message {i}")
+        for i in range(MAX_PREVIOUS_MESSAGES + 5)
+    ]
+    
+    request = QuestionRequest(context="Test context", previous_messages=messages)
+    
+    assert len(request.previous_messages) == MAX_PREVIOUS_MESSAGES
+    assert request.previous_messages[0].content == "Message 5"
+    assert request.previous_messages[-1].content == f"Message {MAX_PREVIOUS_MESSAGES + 4}"
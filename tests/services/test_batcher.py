@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+
+from app.services.batcher import AsyncBatcher
+
+
+@pytest.mark.asyncio
+async def test_batcher_groups_concurrent_submissions():
+    """Test that concurrent submissions are dispatched together."""
+    batch_sizes = []
+
+    async def double(items):
+        batch_sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = AsyncBatcher(double, max_batch=4, max_wait_ms=10)
+
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+
+    # Results come back to the caller that submitted each item
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert batch_sizes == [4, 2]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_per_item_errors():
+    """Test that an exception result only fails the item that produced it."""
+    async def fail_odd(items):
+        return [ValueError(item) if item % 2 else item for item in items]
+
+    batcher = AsyncBatcher(fail_odd, max_batch=8, max_wait_ms=10)
+
+    results = await asyncio.gather(
+        *(batcher.submit(i) for i in range(3)), return_exceptions=True
+    )
+
+    assert results[0] == 0
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 2
@@ -0,0 +1,28 @@
+from app.services.embedding_cache import EmbeddingCache
+
+
+def test_embedding_cache_evicts_least_recently_used():
+    """Test that cached embeddings are returned until evicted by newer texts."""
+    cache = EmbeddingCache(max_size=2)
+    
+    cache.set("first", [0.1, 0.2])
+    cache.set("second", [0.3, 0.4])
+    assert cache.get("first") == [0.1, 0.2]
+    
+    # "second" is now the least recently used entry
+    cache.set("third", [0.5, 0.6])
+    assert cache.get("second") is None
+    assert cache.get("third") == [0.5, 0.6]
+    assert cache.get("unknown") is None
+
+
+def test_embedding_cache_counts_hits_misses_and_evictions():
+    """Test that cache statistics track lookups and evictions."""
+    cache = EmbeddingCache(max_size=1)
+    
+    cache.set("first", [0.1])
+    cache.get("first")
+    cache.get("unknown")
+    cache.set("second", [0.2])
+    
+    assert cache.stats() == {"size": 1, "max_size": 1, "hits": 1, "misses": 1, "evictions": 1}
@@ -0,0 +1,30 @@
+from app.services.query_cache import QueryVectorCache
+
+
+def test_query_cache_reuses_results_of_similar_queries():
+    """Test that a search is answered from the cache by a similar query of the same scope."""
+    cache = QueryVectorCache(dimensions=3, max_size=2, threshold=0.95)
+    scope = cache.make_scope({"conversation_id": "conv-1"}, 5)
+    results = [{"id": "1", "score": 0.9, "text": "cached", "metadata": {}}]
+    
+    cache.set([1.0, 0.0, 0.0], scope, results)
+    
+    assert cache.get([0.99, 0.05, 0.0], scope) == results
+    assert cache.get([0.0, 1.0, 0.0], scope) is None
+    assert cache.get([1.0, 0.0, 0.0], cache.make_scope({"conversation_id": "conv-2"}, 5)) is None
+    assert cache.get([1.0, 0.0, 0.0], cache.make_scope({"conversation_id": "conv-1"}, 3)) is None
+    assert cache.stats() == {"size": 1, "max_size": 2, "hits": 1, "misses": 3}
+
+
+def test_query_cache_invalidates_scopes_matching_stored_points():
+    """Test that storing a point drops cached searches it could appear in."""
+    cache = QueryVectorCache(dimensions=2, max_size=4)
+    scope = cache.make_scope({"conversation_id": "conv-1"}, 5)
+    other_scope = cache.make_scope({"conversation_id": "conv-2"}, 5)
+    cache.set([1.0, 0.0], scope, [])
+    cache.set([1.0, 0.0], other_scope, [])
+    
+    cache.invalidate({"conversation_id": "conv-1", "type": "question"})
+    
+    assert cache.get([1.0, 0.0], scope) is None
+    assert cache.get([1.0, 0.0], other_scope) == []
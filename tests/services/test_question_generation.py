@@ -1,84 +1,89 @@
 import pytest
-from unittest.mock import patch, MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime
 
-from app.services.question_generation import QuestionGenerationService
-from app.schemas.question_generation import QuestionRequest, MessageItem
+from pydantic import ValidationError
 
+from app.services.question_generation import (
+    QuestionGenerationService,
+    _GeneratedBatch,
+    _GeneratedQuestion,
+    _StreamedObjectParser,
+)
+from app.schemas.question_generation import QuestionRequest, MessageItem
 
-@pytest.fixture
-def mock_langchain():
-    """Mock LangChain components."""
-    with patch("app.services.question_generation.LLMChain") as mock_chain:
-        # Set up the chain mock
-        mock_chain_instance = MagicMock()
-        mock_chain_instance.arun = AsyncMock(return_value="What is your favorite programming language?")
-        mock_chain.return_value = mock_chain_instance
-        yield mock_chain
+# Fixed message timestamp, keeping the tests deterministic
+FIXED_TIMESTAMP = datetime(2024, 1, 1)
 
 
 @pytest.fixture
-def mock_vector_db():
+def mock_vector_db(monkeypatch):
     """Mock the vector DB service."""
-    with patch("app.services.question_generation.vector_db_service") as mock_db:
-        # Set up the mock
-        mock_db.search_similar = AsyncMock(return_value=[
-            {
-                "id": "test-id-1",
-                "score": 0.95,
-                "payload": {
-                    "content": "Python is a popular programming language",
-                    "type": "answer",
-                    "conversation_id": "test-conversation-id"
-                }
+    mock_db = MagicMock()
+    monkeypatch.setattr("app.services.question_generation.vector_db_service", mock_db)
+    
+    # Set up the mock
+    mock_db.search_similar = AsyncMock(return_value=[
+        {
+            "id": "test-id-1",
+            "score": 0.95,
+            "payload": {
+                "content": "Python is a popular programming language",
+                "type": "answer",
+                "conversation_id": "test-conversation-id"
             }
-        ])
-        mock_db.store_embedding = AsyncMock(return_value="test-embedding-id")
-        yield mock_db
+        }
+    ])
+    mock_db.store_embeddings = AsyncMock(return_value=["test-embedding-id"])
+    return mock_db
 
 
 @pytest.fixture
-def mock_repositories():
-    """Mock the repositories."""
-    with patch("app.services.question_generation.UserSessionRepository") as mock_user_repo, \
-         patch("app.services.question_generation.ConversationRepository") as mock_conv_repo, \
-         patch("app.services.question_generation.MessageRepository") as mock_msg_repo:
-        
-        # Mock user session repository
-        mock_user_repo_instance = MagicMock()
-        mock_user_repo_instance.get_by_user_identifier = AsyncMock(return_value=None)
-        mock_user_repo_instance.create = AsyncMock(return_value=MagicMock(id="test-session-id"))
-        mock_user_repo.return_value = mock_user_repo_instance
-        
-        # Mock conversation repository
-        mock_conv_repo_instance = MagicMock()
-        mock_conv_repo_instance.get = AsyncMock(return_value=None)
-        mock_conv_repo_instance.get_active_by_user_session_id = AsyncMock(return_value=None)
-        mock_conv_repo_instance.create = AsyncMock(return_value=MagicMock(id="test-conversation-id"))
-        mock_conv_repo.return_value = mock_conv_repo_instance
-        
-        # Mock message repository
-        mock_msg_repo_instance = MagicMock()
-        mock_msg_repo_instance.create = AsyncMock(return_value=MagicMock())
-        mock_msg_repo_instance.get_next_sequence_number = AsyncMock(return_value=1)
-        mock_msg_repo.return_value = mock_msg_repo_instance
-        
-        yield mock_user_repo, mock_conv_repo, mock_msg_repo
+def mock_structured_llm():
+    """Mock the structured LLM call, returning a single generated question."""
+    return AsyncMock(return_value=_GeneratedBatch(
+        questions=[_GeneratedQuestion(
+            question_text="What is your favorite programming language?",
+            importance_explanation="It shows where to start",
+            information_to_look_for="A language name"
+        )],
+        next_batch_needed=True,
+        total_questions_estimated=8
+    ))
 
 
-@pytest.mark.asyncio
-async def test_generate_initial_question(mock_langchain, mock_vector_db, mock_repositories):
-    """Test generating an initial question."""
-    # Create service
+@pytest.fixture
+def configured_service(monkeypatch, mock_vector_db, mock_structured_llm):
+    """Create a question generation service wired to fresh mocks for this test."""
     service = QuestionGenerationService()
     
-    # Replace the _initialize method to use our mocks
-    service._initialize = lambda: None
-    service.initial_question_chain = mock_langchain.return_value
-    service.follow_up_question_chain = mock_langchain.return_value
-    service.user_session_repo = mock_repositories[0].return_value
-    service.conversation_repo = mock_repositories[1].return_value
-    service.message_repo = mock_repositories[2].return_value
+    # Mock user session repository
+    user_session_repository = MagicMock()
+    user_session_repository.get_by_user_identifier = AsyncMock(return_value=None)
+    user_session_repository.create = AsyncMock(return_value=MagicMock(id="test-session-id"))
+    
+    # Mock conversation repository
+    conversation_repository = MagicMock()
+    conversation_repository.get = AsyncMock(return_value=None)
+    conversation_repository.get_active_by_user_session_id = AsyncMock(return_value=None)
+    conversation_repository.create = AsyncMock(return_value=MagicMock(id="test-conversation-id"))
+    
+    # Mock message repository
+    message_repository = MagicMock()
+    message_repository.count_by_conversation = AsyncMock(return_value=0)
+    message_repository.append_many = AsyncMock()
+    
+    monkeypatch.setattr(service, "user_session_repository", user_session_repository)
+    monkeypatch.setattr(service, "conversation_repository", conversation_repository)
+    monkeypatch.setattr(service, "message_repository", message_repository)
+    monkeypatch.setattr(service, "_invoke_structured_llm", mock_structured_llm)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_generate_initial_question(configured_service):
+    """Test generating an initial question batch."""
+    service = configured_service
     
     # Create request
     request = QuestionRequest(
@@ -90,35 +95,27 @@ async def test_generate_initial_question(mock_langchain, mock_vector_db, mock_re
     db_session = MagicMock()
     response = await service.generate_question(db_session, request)
     
-    # Check response
-    assert response is not None
-    assert response.question == "What is your favorite programming language?"
+    # Check response; an initial batch has 5 questions, padded after the generated one
+    assert response.current_question == "What is your favorite programming language?"
+    assert [question.question_number for question in response.questions] == [1, 2, 3, 4, 5]
     assert response.conversation_id == "test-conversation-id"
     assert response.session_id == "test-session-id"
-    assert "metadata" in response.dict()
+    assert response.metadata["question_type"] == "initial"
     
-    # Check that repositories were called
-    service.user_session_repo.create.assert_called_once()
-    service.conversation_repo.create.assert_called_once()
-    service.message_repo.create.assert_called_once()
+    # Check that repositories were called, storing the batch in one statement
+    service.user_session_repository.create.assert_awaited_once()
+    service.conversation_repository.create.assert_awaited_once()
+    service.message_repository.append_many.assert_awaited_once()
+    assert len(service.message_repository.append_many.call_args.kwargs["objs_in"]) == 5
     
-    # Check that LangChain was called
-    service.initial_question_chain.arun.assert_called_once()
+    # Check that the LLM was called once for the whole batch
+    service._invoke_structured_llm.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-async def test_generate_follow_up_question(mock_langchain, mock_vector_db, mock_repositories):
-    """Test generating a follow-up question."""
-    # Create service
-    service = QuestionGenerationService()
-    
-    # Replace the _initialize method to use our mocks
-    service._initialize = lambda: None
-    service.initial_question_chain = mock_langchain.return_value
-    service.follow_up_question_chain = mock_langchain.return_value
-    service.user_session_repo = mock_repositories[0].return_value
-    service.conversation_repo = mock_repositories[1].return_value
-    service.message_repo = mock_repositories[2].return_value
+async def test_generate_follow_up_question(configured_service, mock_vector_db):
+    """Test generating a follow-up question batch."""
+    service = configured_service
     
     # Create request with previous messages
     request = QuestionRequest(
@@ -129,30 +126,75 @@ async def test_generate_follow_up_question(mock_langchain, mock_vector_db, mock_
             MessageItem(
                 role="user",
                 content="I like programming in Python",
-                timestamp=datetime.now()
+                timestamp=FIXED_TIMESTAMP
             ),
             MessageItem(
                 role="assistant",
                 content="That's great! Python is versatile.",
-                timestamp=datetime.now()
+                timestamp=FIXED_TIMESTAMP
             )
         ]
     )
     
-    # Mock conversation retrieval
-    service.conversation_repo.get.return_value = MagicMock(id="existing-conversation-id")
+    # Mock conversation retrieval; two questions were asked already
+    service.conversation_repository.get.return_value = MagicMock(id="existing-conversation-id")
+    service.message_repository.count_by_conversation.return_value = 2
     
     # Generate question
     db_session = MagicMock()
     response = await service.generate_question(db_session, request)
     
-    # Check response
-    assert response is not None
-    assert response.question == "What is your favorite programming language?"
+    # Check response; a follow-up batch has 3 questions, numbered after the earlier ones
+    assert response.current_question == "What is your favorite programming language?"
+    assert [question.question_number for question in response.questions] == [3, 4, 5]
+    assert response.conversation_id == "existing-conversation-id"
+    assert response.metadata["question_type"] == "follow_up"
+    assert response.metadata["context_enhanced"] is True
     
     # Check that vector DB was called for context enhancement
-    service.conversation_repo.get.assert_called_once()
-    mock_vector_db.search_similar.assert_called_once()
+    service.conversation_repository.get.assert_awaited_once()
+    service.conversation_repository.create.assert_not_awaited()
+    mock_vector_db.search_similar.assert_awaited_once()
+    
+    # Check that the prompt carries the previous messages
+    prompt = service._invoke_structured_llm.call_args.args[0]
+    assert any("User: I like programming in Python" in message.content for message in prompt)
+
+
+def test_streamed_object_parser_yields_completed_objects():
+    """Test that array elements are returned as soon as their closing brace arrives."""
+    parser = _StreamedObjectParser()
+    
+    assert parser.feed('```json\n[{"question_text": "What is \\"X\\"') == []
+    assert parser.feed('?", "meta": {"a": "}"}}, {"question_') == [
+        {"question_text": 'What is "X"?', "meta": {"a": "}"}}
+    ]
+    assert parser.feed('text": "Second?"}]\n```') == [{"question_text": "Second?"}]
+
+
+def _batch_validation_error():
+    """Build the error the tools parser raises for tool arguments missing fields."""
+    try:
+        _GeneratedBatch.model_validate({"questions": []})
+    except ValidationError as e:
+        return e
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("llm_result", [
+    {"side_effect": _batch_validation_error()},
+    {"return_value": None},
+], ids=["schema-mismatch", "no-tool-call"])
+async def test_generate_question_batch_falls_back_on_unusable_output(monkeypatch, llm_result):
+    """Test that invalid or missing structured output yields fallback questions."""
+    service = QuestionGenerationService()
+    monkeypatch.setattr(service, "_invoke_structured_llm", AsyncMock(**llm_result))
+    
+    questions, metadata = await service._generate_question_batch(
+        context="Testing question generation",
+        batch_size=3,
+        starting_question_number=4
+    )
     
-    # Check that follow-up question chain was used
-    service.follow_up_question_chain.arun.assert_called_once() 
\ No newline at end of file
+    assert [question["question_number"] for question in questions] == [4, 5, 6]
+    assert metadata["fallback_generation"] is True
@@ -0,0 +1,42 @@
+import pytest
+
+from app.schemas.question_generation import QuestionRequest
+from app.services.response_cache import ResponseCache
+
+
+def test_response_cache_key_ignores_redo_marker():
+    """Test that a redo request maps to the same entry as the original request."""
+    request = QuestionRequest(user_id="test-user", context="Testing", metadata={"source": "test"})
+    redo_request = QuestionRequest(
+        user_id="test-user", context="Testing", metadata={"source": "test", "redo": "true"}
+    )
+    
+    assert ResponseCache.make_key("endpoint", request) == ResponseCache.make_key("endpoint", redo_request)
+    assert ResponseCache.make_key("endpoint", request) != ResponseCache.make_key("other", request)
+    assert not ResponseCache.is_redo(request)
+    assert ResponseCache.is_redo(redo_request)
+
+
+def test_response_cache_skips_requests_creating_a_conversation():
+    """Test that only requests continuing a conversation are cacheable."""
+    assert not ResponseCache.is_cacheable(QuestionRequest(context="Testing"))
+    assert ResponseCache.is_cacheable(QuestionRequest(context="Testing", conversation_id="conv-1"))
+
+
+def test_response_cache_expires_and_evicts(monkeypatch):
+    """Test that entries expire after the TTL and the least recently used entry is evicted."""
+    now = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache = ResponseCache(ttl_seconds=10, max_size=2)
+    
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    
+    # "b" is now the least recently used entry
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    
+    now[0] = 10.0
+    assert cache.get("a") is None
@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 import uuid
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
 
 from app.services.vector_db import VectorDBService
 
@@ -8,142 +9,163 @@ from app.services.vector_db import VectorDBService
 @pytest.fixture
 def mock_qdrant_client():
     client = MagicMock()
-    client.upsert = MagicMock()
-    client.search = MagicMock()
-    client.get_collections = MagicMock()
+    client.upsert = AsyncMock()
+    client.query_points = AsyncMock()
+    client.get_collections = AsyncMock()
+    client.create_collection = AsyncMock()
     return client
 
 
 @pytest.fixture
 def mock_openai_embeddings():
     embeddings = MagicMock()
-    embeddings.embed_query = MagicMock(return_value=[0.1] * 1536)
+    embeddings.aembed_query = AsyncMock(return_value=[0.1] * 1536)
     return embeddings
 
 
 @pytest.fixture
 def vector_db_service(mock_qdrant_client, mock_openai_embeddings):
-    with patch('app.services.vector_db.QdrantClient', return_value=mock_qdrant_client), \
-         patch('app.services.vector_db.OpenAIEmbeddings', return_value=mock_openai_embeddings):
-        
-        # Create a fresh instance
-        VectorDBService._instance = None
-        service = VectorDBService()
-        
-        # Mock the _ensure_collection_exists method
-        service._ensure_collection_exists = MagicMock()
-        
-        yield service
+    # Create a fresh instance rather than the shared one, on the mocks
+    return VectorDBService(client=mock_qdrant_client, embeddings=mock_openai_embeddings)
 
 
 @pytest.mark.asyncio
-async def test_store_embedding_with_uuid_string(vector_db_service):
-    """Test storing embedding with UUID string ID."""
-    uuid_str = str(uuid.uuid4())
+async def test_ensure_collection_creates_missing_collection(vector_db_service):
+    """Test that the collection is created at startup when Qdrant lacks it."""
+    vector_db_service.client.get_collections.return_value = MagicMock(collections=[])
     
-    result = await vector_db_service.store_embedding(
-        text="Test embedding", 
-        metadata={"test": "value"},
-        id=uuid_str
-    )
+    await vector_db_service.ensure_collection_exists_with_retry()
     
-    # Verify the ID was used correctly
-    assert result == uuid_str
-    vector_db_service.client.upsert.assert_called_once()
-    # Extract the ID that was passed to upsert
-    call_args = vector_db_service.client.upsert.call_args[1]
-    points = call_args.get('points', [])
-    assert len(points) == 1
-    assert points[0].id == uuid_str
+    vector_db_service.client.create_collection.assert_awaited_once()
+    assert vector_db_service.client.create_collection.call_args[1]['collection_name'] == vector_db_service.collection_name
 
 
 @pytest.mark.asyncio
-async def test_store_embedding_with_numeric_id(vector_db_service):
-    """Test storing embedding with numeric ID (should be converted to UUID)."""
-    numeric_id = "123"
+async def test_bulk_ingest_defers_indexing_and_restores_settings(vector_db_service):
+    """Test that bulk ingest disables HNSW indexing and restores the previous settings."""
+    config = MagicMock()
+    config.hnsw_config.m = 16
+    config.optimizer_config.indexing_threshold = 10000
+    vector_db_service.client.get_collection = AsyncMock(return_value=MagicMock(config=config))
+    vector_db_service.client.update_collection = AsyncMock()
+    
+    async with vector_db_service.bulk_ingest():
+        disabled = vector_db_service.client.update_collection.call_args[1]
+        assert disabled['hnsw_config'].m == 0
+        assert disabled['optimizers_config'].indexing_threshold == 0
     
+    restored = vector_db_service.client.update_collection.call_args[1]
+    assert restored['hnsw_config'].m == 16
+    assert restored['optimizers_config'].indexing_threshold == 10000
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw_id, keeps_id", [
+    (str(uuid.uuid4()), True),
+    ("123", False),
+    ("not a uuid or number", False),
+    (str(uuid.uuid4()) + "\n", False),
+    (None, False),
+], ids=["uuid", "numeric", "invalid", "trailing-newline", "none"])
+async def test_store_embedding_point_id(vector_db_service, raw_id, keeps_id):
+    """Test that UUID IDs are stored as given and any other ID is replaced by a new UUID."""
     result = await vector_db_service.store_embedding(
         text="Test embedding", 
         metadata={"test": "value"},
-        id=numeric_id
+        id=raw_id
     )
     
-    # Verify the ID was converted to UUID
-    assert result != numeric_id
-    assert uuid.UUID(result)  # Should be valid UUID
+    # Verify the returned ID is a valid UUID, and the given one only if it was a UUID
+    assert uuid.UUID(result)
+    assert (result == raw_id) is keeps_id
     
     vector_db_service.client.upsert.assert_called_once()
     # Extract the ID that was passed to upsert
     call_args = vector_db_service.client.upsert.call_args[1]
     points = call_args.get('points', [])
     assert len(points) == 1
-    assert points[0].id != numeric_id
-    # Verify it's a valid UUID
-    uuid.UUID(points[0].id)
+    assert points[0].id == result
 
 
 @pytest.mark.asyncio
-async def test_store_embedding_with_invalid_id(vector_db_service):
-    """Test storing embedding with an invalid ID (should be converted to UUID)."""
-    invalid_id = "not a uuid or number"
+async def test_store_embedding_with_exception(vector_db_service):
+    """Test handling exception when storing embedding."""
+    # Make the upsert method raise an exception
+    vector_db_service.client.upsert.side_effect = Exception("Test exception")
     
+    # Should not raise but return a fallback ID
     result = await vector_db_service.store_embedding(
         text="Test embedding", 
-        metadata={"test": "value"},
-        id=invalid_id
+        metadata={"test": "value"}
     )
     
-    # Verify the ID was converted to UUID
-    assert result != invalid_id
-    assert uuid.UUID(result)  # Should be valid UUID
+    # Verify a fallback ID was returned
+    assert result is not None
+    assert result.startswith("fallback-")
     
-    vector_db_service.client.upsert.assert_called_once()
-    # Extract the ID that was passed to upsert
-    call_args = vector_db_service.client.upsert.call_args[1]
-    points = call_args.get('points', [])
-    assert len(points) == 1
-    assert points[0].id != invalid_id
-    # Verify it's a valid UUID
-    uuid.UUID(points[0].id)
-
+    # Verify upsert was called
+    vector_db_service.client.upsert.assert_called_once() 
 
 @pytest.mark.asyncio
-async def test_store_embedding_with_no_id(vector_db_service):
-    """Test storing embedding with no ID provided (should generate UUID)."""
+async def test_store_embedding_skips_upsert_when_embedding_fails(vector_db_service, mock_openai_embeddings):
+    """Test that nothing is stored when the text cannot be embedded."""
+    mock_openai_embeddings.aembed_query.side_effect = Exception("API unavailable")
+    
     result = await vector_db_service.store_embedding(
         text="Test embedding", 
-        metadata={"test": "value"},
-        id=None
+        metadata={"test": "value"}
     )
     
-    # Verify a UUID was generated
-    assert result is not None
-    assert uuid.UUID(result)  # Should be valid UUID
+    assert result.startswith("fallback-")
+    vector_db_service.client.upsert.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_store_embeddings_uses_one_embedding_call_and_upsert(vector_db_service, mock_openai_embeddings):
+    """Test storing several embeddings with a single embedding call and upsert."""
+    mock_openai_embeddings.aembed_documents = AsyncMock(return_value=[[0.1] * 1536, [0.2] * 1536])
     
+    result = await vector_db_service.store_embeddings(
+        texts=["First text", "Second text"],
+        metadatas=[{"n": 1}, {"n": 2}]
+    )
+    
+    assert len(result) == 2
+    mock_openai_embeddings.aembed_documents.assert_awaited_once_with(["First text", "Second text"])
     vector_db_service.client.upsert.assert_called_once()
-    # Extract the ID that was passed to upsert
-    call_args = vector_db_service.client.upsert.call_args[1]
-    points = call_args.get('points', [])
-    assert len(points) == 1
-    # Verify it's a valid UUID
-    uuid.UUID(points[0].id)
+    points = vector_db_service.client.upsert.call_args[1].get('points', [])
+    assert [point.id for point in points] == result
+    assert [point.payload for point in points] == [{"n": 1}, {"n": 2}]
 
 
 @pytest.mark.asyncio
-async def test_store_embedding_with_exception(vector_db_service):
-    """Test handling exception when storing embedding."""
-    # Make the upsert method raise an exception
-    vector_db_service.client.upsert.side_effect = Exception("Test exception")
+async def test_concurrent_store_embedding_calls_share_one_upsert(vector_db_service):
+    """Test that points stored concurrently are upserted in a single request."""
+    result = await asyncio.gather(*(
+        vector_db_service.store_embedding(text=f"Text {n}", metadata={"n": n})
+        for n in range(3)
+    ))
     
-    # Should not raise but return a fallback ID
-    result = await vector_db_service.store_embedding(
-        text="Test embedding", 
-        metadata={"test": "value"}
+    vector_db_service.client.upsert.assert_called_once()
+    points = vector_db_service.client.upsert.call_args[1].get('points', [])
+    assert [point.id for point in points] == result
+
+
+@pytest.mark.asyncio
+async def test_search_similar_batch_uses_one_embedding_call_and_query(vector_db_service, mock_openai_embeddings):
+    """Test searching several queries with a single embedding call and batched query."""
+    mock_openai_embeddings.aembed_documents = AsyncMock(return_value=[[0.1] * 1536, [0.2] * 1536])
+    point = MagicMock(id="point-1", score=0.9, payload={"n": 1})
+    vector_db_service.client.query_batch_points = AsyncMock(
+        return_value=[MagicMock(points=[point]), MagicMock(points=[])]
     )
     
-    # Verify a fallback ID was returned
-    assert result is not None
-    assert result.startswith("fallback-")
+    result = await vector_db_service.search_similar_batch(
+        queries=["First query", "Second query"],
+        filter_params={"conversation_id": "conv-1"}
+    )
     
-    # Verify upsert was called
-    vector_db_service.client.upsert.assert_called_once() 
\ No newline at end of file
+    assert result == [[{"id": "point-1", "score": 0.9, "payload": {"n": 1}}], []]
+    mock_openai_embeddings.aembed_documents.assert_awaited_once_with(["First query", "Second query"])
+    vector_db_service.client.query_batch_points.assert_awaited_once()
+    requests = vector_db_service.client.query_batch_points.call_args[1]['requests']
+    assert len(requests) == 2